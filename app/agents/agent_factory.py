@@ -37,15 +37,16 @@ class AgentFactory:
     
     def create_agent(self, agent_type: str) -> Optional[BaseAgent]:
         """创建Agent实例"""
+        # 已有实例时一次字典查找即返回（单例模式）
+        agent_instance = self._agent_instances.get(agent_type)
+        if agent_instance is not None:
+            return agent_instance
+        
         try:
             if agent_type not in self._agent_registry:
                 logger.error(f"未知的Agent类型: {agent_type}")
                 return None
             
-            # 检查是否已有实例（单例模式）
-            if agent_type in self._agent_instances:
-                return self._agent_instances[agent_type]
-            
             # 创建新实例
             agent_class = self._agent_registry[agent_type]
             agent_instance = agent_class(self.tool_manager, self.llm_manager)
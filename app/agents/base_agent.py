@@ -8,6 +8,9 @@ from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# 子任务的必需字段，校验时整体做一次集合包含判断
+_SUBTASK_REQUIRED_FIELDS = frozenset(('subtask_id', 'subagent_name', 'goal', 'dependencies'))
+
 
 class BaseAgent(ABC):
     """Agent基类"""
@@ -99,12 +102,7 @@ class OrchestratorAgent(BaseAgent):
             if 'subtasks' not in result:
                 return False
             
-            for subtask in result['subtasks']:
-                required_fields = ['subtask_id', 'subagent_name', 'goal', 'dependencies']
-                if not all(field in subtask for field in required_fields):
-                    return False
-            
-            return True
+            return all(_SUBTASK_REQUIRED_FIELDS <= subtask.keys() for subtask in result['subtasks'])
         except:
             return False
 
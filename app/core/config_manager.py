@@ -9,8 +9,53 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 import logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# 保存配置时是否fsync，设置STORAGE_SYNC_POLICY=none可在基准测试时全局关闭
+STORAGE_SYNC_POLICY = os.environ.get('STORAGE_SYNC_POLICY', 'durable')
+
+# 对外展示配置时需要隐藏的键名片段（在任意嵌套层级匹配）
+SENSITIVE_KEY_PARTS = ('password', 'secret', 'key', 'token')
+
+
+def _is_sensitive_key(key: Any) -> bool:
+    """键名是否包含敏感片段"""
+    lowered = str(key).lower()
+    return any(part in lowered for part in SENSITIVE_KEY_PARTS)
+
+
+def _redact(value: Any) -> Any:
+    """递归复制配置，去除所有层级中的敏感键"""
+    if isinstance(value, dict):
+        return {k: _redact(v) for k, v in value.items() if not _is_sensitive_key(k)}
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+
+def _json_dumps(data: Any) -> bytes:
+    """序列化为带缩进的UTF-8 JSON，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _json_loads(data: bytes) -> Any:
+    """反序列化JSON，优先使用orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class ConfigConflictError(Exception):
+    """配置文件在读取之后已被修改（乐观并发检查失败）"""
+    pass
+
 
 class ConfigManager:
     """配置管理器 - 负责系统配置的读取、验证和热更新"""
@@ -18,8 +63,13 @@ class ConfigManager:
     def __init__(self, config_dir: str = "config"):
         self.config_dir = Path(config_dir)
         self.config_file = self.config_dir / "default.json"
+        # 写锁：读取不加锁，修改时复制路径上的字典并整体替换快照
         self.lock = threading.RLock()
         self._config = {}
+        # 已加载配置文件的修改时间，用于判断文件是否需要重新解析
+        self._config_mtime_ns: Optional[int] = None
+        # 脱敏配置缓存：(生成时的配置快照, 脱敏结果)，快照被替换后失效
+        self._safe_config_cache: Optional[tuple] = None
         
         # 确保配置目录存在
         self.config_dir.mkdir(parents=True, exist_ok=True)
@@ -27,13 +77,22 @@ class ConfigManager:
         # 加载配置
         self._load_config()
     
+    def _stat_mtime_ns(self) -> Optional[int]:
+        """获取配置文件的修改时间，文件不存在时返回None"""
+        try:
+            return os.stat(self.config_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
     def _load_config(self):
         """加载配置文件"""
         with self.lock:
             if self.config_file.exists():
                 try:
-                    with open(self.config_file, 'r', encoding='utf-8') as f:
-                        self._config = json.load(f)
+                    mtime_ns = self._stat_mtime_ns()
+                    with open(self.config_file, 'rb') as f:
+                        self._config = _json_loads(f.read())
+                    self._config_mtime_ns = mtime_ns
                     logger.info(f"配置加载成功: {self.config_file}")
                 except Exception as e:
                     logger.error(f"配置加载失败: {e}")
@@ -52,12 +111,19 @@ class ConfigManager:
                 "max_retries": 3,
                 "retry_delay": 5,
                 "task_timeout": 3600,
-                "queue_check_interval": 5
+                "queue_check_interval": 5,
+                "subtask_parallelism": 8,
+                "llm_max_concurrency": 8,
+                "llm_rate_limit": 0,
+                "llm_probe_interval": 15
             },
             "web": {
                 "host": "0.0.0.0",
                 "port": 5000,
-                "debug": False
+                "debug": False,
+                "threads": 8,
+                "health_cache_ttl": 1.0,
+                "use_x_sendfile": False
             },
             "llm": {
                 "provider": "openai",
@@ -115,11 +181,17 @@ class ConfigManager:
             }
         }
     
-    def _save_config(self):
-        """保存配置到文件"""
+    def _save_config(self, durable: bool = True):
+        """保存配置到文件：写临时文件后原子替换，durable为True时先落盘"""
+        temp_file = self.config_file.with_suffix('.tmp')
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self._config, f, ensure_ascii=False, indent=2)
+            with open(temp_file, 'wb', buffering=65536) as f:
+                f.write(_json_dumps(self._config))
+                if durable and STORAGE_SYNC_POLICY != 'none':
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_file, self.config_file)
+            self._config_mtime_ns = self._stat_mtime_ns()
             logger.info("配置保存成功")
         except Exception as e:
             logger.error(f"配置保存失败: {e}")
@@ -127,39 +199,61 @@ class ConfigManager:
     
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置值，支持点分隔的嵌套键"""
-        with self.lock:
-            keys = key.split('.')
-            value = self._config
-            
-            for k in keys:
-                if isinstance(value, dict) and k in value:
-                    value = value[k]
-                else:
-                    return default
-            
-            return value
+        # 读取当前快照，写入方只会替换快照而不会原地修改
+        value = self._config
+        
+        for k in key.split('.'):
+            if isinstance(value, dict) and k in value:
+                value = value[k]
+            else:
+                return default
+        
+        return value
     
     def set(self, key: str, value: Any, save: bool = True):
         """设置配置值，支持点分隔的嵌套键"""
         with self.lock:
             keys = key.split('.')
-            config = self._config
+            root = config = dict(self._config)
             
-            # 导航到父级配置
+            # 导航到父级配置，沿途复制字典，不影响正在读取旧快照的线程
             for k in keys[:-1]:
-                if k not in config:
-                    config[k] = {}
+                config[k] = dict(config[k]) if k in config else {}
                 config = config[k]
             
             # 设置值
             config[keys[-1]] = value
+            self._config = root
             
             if save:
                 self._save_config()
     
-    def update(self, updates: Dict[str, Any], save: bool = True):
+    @property
+    def config_mtime_ns(self) -> Optional[int]:
+        """当前配置对应的文件修改时间，可作为update的expected_mtime_ns"""
+        return self._config_mtime_ns
+    
+    def _check_precondition(self, expected_mtime_ns: Optional[int]):
+        """乐观并发检查：调用方读取后配置文件又被修改过时拒绝写入"""
+        if expected_mtime_ns is not None and expected_mtime_ns != self._config_mtime_ns:
+            raise ConfigConflictError(
+                f"配置已被修改: 期望 {expected_mtime_ns}, 当前 {self._config_mtime_ns}"
+            )
+    
+    def _mutate(self, key: str, mutator, save: bool = True):
+        """在锁内对某个配置字典做读-改-写，只写一次文件"""
+        with self.lock:
+            value = dict(self.get(key, {}))
+            if mutator(value) is False:
+                return False
+            self.set(key, value, save=save)
+            return True
+    
+    def update(self, updates: Dict[str, Any], save: bool = True,
+               expected_mtime_ns: Optional[int] = None):
         """批量更新配置"""
         with self.lock:
+            self._check_precondition(expected_mtime_ns)
             for key, value in updates.items():
                 self.set(key, value, save=False)
             
@@ -168,13 +262,34 @@ class ConfigManager:
     
     def get_all(self) -> Dict[str, Any]:
         """获取所有配置"""
-        with self.lock:
-            return self._config.copy()
+        return self._config.copy()
     
-    def reload(self):
-        """重新加载配置文件"""
-        logger.info("重新加载配置...")
-        self._load_config()
+    def get_safe_config(self) -> Dict[str, Any]:
+        """获取递归去除敏感键后的配置，结果按配置快照缓存
+        
+        写入方总是整体替换快照，因此快照对象不变即说明配置未变化。
+        返回的是独立副本，不与内部配置共享嵌套对象。
+        """
+        config = self._config
+        cache = self._safe_config_cache
+        if cache is not None and cache[0] is config:
+            return cache[1]
+        
+        safe_config = _redact(config)
+        
+        self._safe_config_cache = (config, safe_config)
+        return safe_config
+    
+    def reload(self, force: bool = False) -> bool:
+        """重新加载配置文件；文件自上次加载后未修改时跳过解析，返回是否重新加载"""
+        with self.lock:
+            if not force and self._config_mtime_ns is not None \
+                    and self._stat_mtime_ns() == self._config_mtime_ns:
+                return False
+            
+            logger.info("重新加载配置...")
+            self._load_config()
+            return True
     
     def validate_config(self) -> bool:
         """验证配置的有效性"""
@@ -253,18 +368,13 @@ class ConfigManager:
             "notification_configs": notification_configs or []
         }
         
-        cron_jobs = self.get('cron_jobs', {})
-        cron_jobs[job_name] = job_config
-        self.set('cron_jobs', cron_jobs)
+        self._mutate('cron_jobs', lambda cron_jobs: cron_jobs.update({job_name: job_config}))
         
         logger.info(f"添加定时任务: {job_name}")
     
     def remove_cron_job(self, job_name: str):
         """删除定时任务"""
-        cron_jobs = self.get('cron_jobs', {})
-        if job_name in cron_jobs:
-            del cron_jobs[job_name]
-            self.set('cron_jobs', cron_jobs)
+        if self._mutate('cron_jobs', lambda cron_jobs: cron_jobs.pop(job_name, None) is not None):
             logger.info(f"删除定时任务: {job_name}")
     
     def get_web_config(self) -> Dict[str, Any]:
@@ -3,11 +3,14 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 from typing import Dict, Any, Optional, List
 import time
 import json
 
+from ..agents.base_agent import _SUBTASK_REQUIRED_FIELDS
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,12 +19,25 @@ class LLMError(Exception):
     pass
 
 
+def _create_http_session() -> requests.Session:
+    """创建带连接池的HTTP会话，连接池足够容纳并行子任务的并发调用"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# 所有LLMManager实例共享的HTTP会话，对LLM服务复用TCP/TLS连接
+_SHARED_SESSION = _create_http_session()
+
+
 class LLMManager:
     """大语言模型管理器 - 统一管理对LLM的API调用"""
     
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, session: Optional[requests.Session] = None):
         self.config_manager = config_manager
-        self.session = requests.Session()
+        self.session = session if session is not None else _SHARED_SESSION
         
         # 设置默认超时
         self.default_timeout = 60
@@ -215,10 +231,11 @@ class LLMManager:
                     raise ValueError("缺少subtasks字段")
                 
                 for subtask in result['subtasks']:
-                    required_fields = ['subtask_id', 'subagent_name', 'goal', 'dependencies']
-                    for field in required_fields:
-                        if field not in subtask:
-                            raise ValueError(f"子任务缺少必要字段: {field}")
+                    if not isinstance(subtask, dict):
+                        raise ValueError(f"子任务格式无效: {subtask!r}")
+                    missing_fields = _SUBTASK_REQUIRED_FIELDS - subtask.keys()
+                    if missing_fields:
+                        raise ValueError(f"子任务缺少必要字段: {', '.join(sorted(missing_fields))}")
                 
                 return result
                 
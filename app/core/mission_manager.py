@@ -2,23 +2,78 @@
 任务管理器 - 负责任务数据的持久化存储和管理
 """
 
+import copy
+import hashlib
+import heapq
 import json
 import os
+import pickle
+import queue
+import re
 import threading
+from collections import Counter, OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import logging
 import fcntl
 from datetime import datetime
 
 from .models import Mission, MissionStatus
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# 终态的字符串取值，写盘线程据此判断是否需要重写完整任务文件
+_TERMINAL_STATUS_VALUES = frozenset((MissionStatus.COMPLETED.value, MissionStatus.FAILED.value))
+
+# 完整快照中记录快照标识的保留键；增量日志首行以_LOG_BASE_KEY记录其所基于的快照标识，
+# 与当前快照不符的日志是合并后未及删除的旧日志，回放时忽略
+_SNAPSHOT_ID_KEY = '_snapshot_id'
+_LOG_BASE_KEY = '_base_snapshot'
+
+
+# 备份中允许的任务ID格式（防止成员名中的路径分隔符和特殊文件名）
+_MISSION_ID_PATTERN = re.compile(r'[0-9A-Za-z_-]{1,64}')
+
+
+def _created_at_key(item) -> str:
+    """索引项(mission_id, info)的排序键：创建时间"""
+    return item[1]['created_at']
+
+
+def _json_dumps(data: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+    """序列化为UTF-8编码的JSON，优先使用orjson"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, ensure_ascii=False, sort_keys=sort_keys,
+                      indent=2 if indent else None).encode('utf-8')
+
+
+def _json_loads(data):
+    """反序列化JSON，优先使用orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 class MissionManager:
     """任务管理器 - 任务数据的"管家"""
     
+    # 尾部日志超过该大小时合并回完整的任务文件
+    TAIL_LOG_MAX_BYTES = 64 * 1024
+    
+    # 内存中缓存的任务对象数量上限
+    MISSION_CACHE_SIZE = 256
+    
     def __init__(self, missions_dir: str = "data/missions"):
         self.missions_dir = Path(missions_dir)
         self.lock = threading.RLock()
@@ -26,73 +81,381 @@ class MissionManager:
         # 确保任务目录存在
         self.missions_dir.mkdir(parents=True, exist_ok=True)
         
-        # 创建索引缓存
+        # 热路径上直接拼接字符串路径，避免反复构造Path对象
+        self._missions_dir_str = str(self.missions_dir) + os.sep
+        
+        # 创建索引缓存（写时复制：写者替换整个字典，读者直接读取当前引用）
         self._index_cache = {}
         self._cache_lock = threading.RLock()
         
+        # 增量维护的统计计数（随索引写入更新，受_cache_lock保护）
+        self._status_counts: Counter = Counter()
+        self._today_date = datetime.now().date().isoformat()
+        self._today_count = 0
+        
+        # 最近一次写入磁盘的各字段摘要，用于跳过无变化的更新并计算增量（仅写盘线程访问）
+        self._last_digests: Dict[str, Dict[str, bytes]] = {}
+        # 本实例最近一次写盘后的文件状态和快照标识（仅写盘线程访问）；文件状态不符说明
+        # 其他实例写过该任务，此时摘要已不代表磁盘内容，需要重写完整快照
+        self._written_stamps: Dict[str, tuple] = {}
+        self._snapshot_ids: Dict[str, str] = {}
+        
+        # 异步写盘：已提交但尚未落盘的最新任务数据，以及有界写盘队列
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._write_queue: queue.Queue = queue.Queue(maxsize=1024)
+        
+        # 直写式LRU任务对象缓存（受self.lock保护），避免重复读取和解析任务文件。
+        # 每项为(任务对象, 最近一次写入或读取时的字典快照)，非共享的读取方从快照复制
+        self._mission_cache: 'OrderedDict[str, Tuple[Mission, Dict[str, Any]]]' = OrderedDict()
+        # 缓存对象对应的磁盘文件状态（受self.lock保护）；磁盘状态变化说明其他实例写过该任务，缓存失效
+        self._cache_stamps: Dict[str, tuple] = {}
+        
         # 重建索引
         self._rebuild_index()
+        
+        self._start_writer()
     
-    def _get_mission_file_path(self, mission_id: str) -> Path:
+    def _get_mission_file_path(self, mission_id: str) -> str:
         """获取任务文件路径"""
-        return self.missions_dir / f"{mission_id}.json"
+        return self._missions_dir_str + mission_id + '.pkl'
+    
+    def _get_legacy_json_path(self, mission_id: str) -> str:
+        """获取旧版JSON任务文件路径"""
+        return self._missions_dir_str + mission_id + '.json'
+    
+    def _get_tail_log_path(self, mission_id: str) -> str:
+        """获取任务增量日志路径"""
+        return self._missions_dir_str + mission_id + '.log'
+    
+    def _disk_stamp(self, mission_id: str) -> tuple:
+        """任务快照和增量日志的文件状态，任一文件被改写后都会变化"""
+        stamp = []
+        for path in (self._get_mission_file_path(mission_id), self._get_tail_log_path(mission_id)):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                stamp.append(None)
+            else:
+                stamp.append((st.st_ino, st.st_size, st.st_mtime_ns))
+        return tuple(stamp)
+    
+    def _count_entry(self, entry: Dict[str, Any], delta: int):
+        """将索引项计入（或移出）统计计数，调用方需持有_cache_lock"""
+        self._status_counts[entry['status']] += delta
+        if (entry.get('created_at') or '').startswith(self._today_date):
+            self._today_count += delta
+    
+    def _set_index_entry(self, mission_id: str, entry: Dict[str, Any]):
+        """写入索引项（写时复制，读者无需加锁）"""
+        with self._cache_lock:
+            new_cache = dict(self._index_cache)
+            old_entry = new_cache.get(mission_id)
+            new_cache[mission_id] = entry
+            self._index_cache = new_cache
+            
+            if old_entry is not None:
+                self._count_entry(old_entry, -1)
+            self._count_entry(entry, 1)
+    
+    def _remove_index_entry(self, mission_id: str):
+        """移除索引项（写时复制，读者无需加锁）"""
+        with self._cache_lock:
+            if mission_id in self._index_cache:
+                new_cache = dict(self._index_cache)
+                old_entry = new_cache.pop(mission_id)
+                self._index_cache = new_cache
+                self._count_entry(old_entry, -1)
+    
+    def _recount(self):
+        """根据当前索引重新计算统计计数，调用方需持有_cache_lock"""
+        self._status_counts = Counter()
+        self._today_date = datetime.now().date().isoformat()
+        self._today_count = 0
+        for entry in self._index_cache.values():
+            self._count_entry(entry, 1)
+    
+    @staticmethod
+    def _field_digests(data: Dict[str, Any]) -> Dict[str, bytes]:
+        """计算各顶层字段序列化后的摘要"""
+        return {
+            key: hashlib.blake2b(_json_dumps(value, sort_keys=True), digest_size=16).digest()
+            for key, value in data.items()
+        }
+    
+    def _apply_tail_log(self, mission_id: str, mission_data: Dict[str, Any]) -> Dict[str, Any]:
+        """将增量日志中的字段变更回放到任务数据上"""
+        snapshot_id = mission_data.pop(_SNAPSHOT_ID_KEY, None)
+        log_path = self._get_tail_log_path(mission_id)
+        if not os.path.exists(log_path):
+            return mission_data
+        
+        with open(log_path, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = _json_loads(line)
+                except ValueError:
+                    # 崩溃时可能留下不完整的最后一行
+                    logger.warning(f"忽略损坏的增量日志记录: {log_path}")
+                    break
+                
+                if _LOG_BASE_KEY in record:
+                    if record[_LOG_BASE_KEY] != snapshot_id:
+                        # 合并时在删除日志前崩溃：日志内容已包含在当前快照中
+                        logger.warning(f"忽略已合并的增量日志: {log_path}")
+                        break
+                    continue
+                mission_data.update(record)
+        
+        return mission_data
+    
+    def _write_mission_file(self, file_path: str, payload: bytes, tail_log: Optional[str] = None):
+        """原子性写入完整的任务文件，并丢弃已合并的增量日志
+        
+        先替换快照再删除日志：两步之间崩溃时，残留日志的快照标识与新快照不符，回放时会被忽略。
+        """
+        stem = file_path[:-4]
+        # 临时文件名带进程和写盘线程标识，同一目录的多个实例互不覆盖，无需加锁
+        temp_file = f"{stem}.{os.getpid()}.{threading.get_ident()}.tmp"
+        
+        fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            # 只需保证数据和文件长度落盘，fdatasync省去时间戳等元数据的日志提交
+            os.fdatasync(fd)
+        finally:
+            os.close(fd)
+        
+        # 原子性替换
+        os.replace(temp_file, file_path)
+        
+        # 新快照已包含日志中的全部变更
+        if tail_log is not None and os.path.exists(tail_log):
+            os.unlink(tail_log)
+        
+        # 新快照生效后移除旧版JSON文件
+        legacy_file = stem + '.json'
+        if os.path.exists(legacy_file):
+            os.unlink(legacy_file)
+    
+    def _read_snapshot(self, mission_id: str) -> Optional[Dict[str, Any]]:
+        """读取任务快照，兼容旧版JSON文件；不存在时返回None"""
+        file_path = self._get_mission_file_path(mission_id)
+        
+        if os.path.exists(file_path):
+            with open(file_path, 'rb') as f:
+                # 获取共享锁进行读取
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+                try:
+                    return pickle.load(f)
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        
+        legacy_file = self._get_legacy_json_path(mission_id)
+        if os.path.exists(legacy_file):
+            with open(legacy_file, 'rb') as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+                try:
+                    return _json_loads(f.read())
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        
+        return None
+    
+    def _append_tail_log(self, mission_id: str, changes: Dict[str, Any], snapshot_id: str) -> int:
+        """追加一条字段变更记录，返回日志当前大小；新日志以所基于的快照标识开头"""
+        line = _json_dumps(changes) + b'\n'
+        
+        with open(self._get_tail_log_path(mission_id), 'ab') as f:
+            if f.tell() == 0:
+                line = _json_dumps({_LOG_BASE_KEY: snapshot_id}) + b'\n' + line
+            f.write(line)
+            f.flush()
+            os.fdatasync(f.fileno())
+            return f.tell()
     
     def _rebuild_index(self):
         """重建任务索引缓存"""
         with self._cache_lock:
-            self._index_cache = {}
+            new_cache = {}
             
-            for mission_file in self.missions_dir.glob("*.json"):
+            # 同时识别新的pickle快照和尚未迁移的旧版JSON文件
+            mission_ids = {f.stem for f in self.missions_dir.glob("*.pkl")}
+            mission_ids.update(f.stem for f in self.missions_dir.glob("*.json"))
+            
+            for mission_id in mission_ids:
+                mission_file = self._get_mission_file_path(mission_id)
                 try:
-                    mission_id = mission_file.stem
-                    with open(mission_file, 'r', encoding='utf-8') as f:
-                        mission_data = json.load(f)
+                    mission_data = self._read_snapshot(mission_id)
+                    mission_data = self._apply_tail_log(mission_id, mission_data)
                     
-                    self._index_cache[mission_id] = {
+                    new_cache[mission_id] = {
                         'status': mission_data.get('status', 'unknown'),
                         'created_at': mission_data.get('created_at'),
                         'natural_language_goal': mission_data.get('natural_language_goal', ''),
-                        'file_path': str(mission_file)
+                        'file_path': mission_file
                     }
                 except Exception as e:
                     logger.warning(f"跳过无效的任务文件 {mission_file}: {e}")
+            
+            # 整体替换引用，读者始终看到完整的快照
+            self._index_cache = new_cache
+            self._recount()
         
         logger.info(f"重建任务索引完成，共 {len(self._index_cache)} 个任务")
     
-    def create_mission(self, mission: Mission) -> bool:
-        """创建新任务"""
+    def _start_writer(self):
+        """启动后台写盘线程"""
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
+    
+    def _writer_loop(self):
+        """后台写盘线程主循环"""
+        while True:
+            job = self._write_queue.get()
+            try:
+                # 合并写入：队列中已有同一任务更新的快照时，跳过这次过期的非持久化更新
+                if job['op'] == 'update' and job['done'] is None:
+                    with self.lock:
+                        superseded = self._pending.get(job['mission_id']) is not job['data']
+                    if superseded:
+                        job['ok'] = True
+                        continue
+                
+                job['ok'] = self._write_to_disk(job)
+            except Exception as e:
+                logger.error(f"任务写盘失败 {job['mission_id']}: {e}")
+                job['ok'] = False
+            finally:
+                with self.lock:
+                    # 仅当没有更新的待写入数据时才移除，并记下此时的磁盘状态供缓存校验
+                    if job['data'] is not None and self._pending.get(job['mission_id']) is job['data']:
+                        del self._pending[job['mission_id']]
+                        self._cache_stamps[job['mission_id']] = self._disk_stamp(job['mission_id'])
+                if job['done'] is not None:
+                    job['done'].set()
+                self._write_queue.task_done()
+    
+    def _write_to_disk(self, job: Dict[str, Any]) -> bool:
+        """执行一次写盘任务"""
+        mission_id = job['mission_id']
+        data = job['data']
+        file_path = self._get_mission_file_path(mission_id)
+        tail_log = self._get_tail_log_path(mission_id)
+        
+        if job['op'] == 'delete':
+            for path in (file_path, self._get_legacy_json_path(mission_id), tail_log):
+                if os.path.exists(path):
+                    os.unlink(path)
+            self._last_digests.pop(mission_id, None)
+            self._written_stamps.pop(mission_id, None)
+            self._snapshot_ids.pop(mission_id, None)
+            return True
+        
+        digests = self._field_digests(data)
+        last_digests = self._last_digests.get(mission_id)
+        snapshot_id = self._snapshot_ids.get(mission_id)
+        
+        # 增量只能基于本实例最近写入的磁盘内容计算：其他实例写过该任务时重写完整快照
+        if (job['op'] == 'create' or last_digests is None or snapshot_id is None or
+                data['status'] in _TERMINAL_STATUS_VALUES or
+                self._written_stamps.get(mission_id) != self._disk_stamp(mission_id)):
+            changes = None
+        else:
+            changes = {key: data[key] for key, digest in digests.items()
+                       if last_digests.get(key) != digest}
+            
+            # 内容与上次写入一致时跳过写盘
+            if not changes:
+                logger.debug(f"任务无变化，跳过写入: {mission_id}")
+                return True
+        
+        if changes is None or \
+                self._append_tail_log(mission_id, changes, snapshot_id) > self.TAIL_LOG_MAX_BYTES:
+            # 合并：重写完整文件（带新的快照标识）并丢弃增量日志
+            snapshot_id = os.urandom(8).hex()
+            self._write_mission_file(
+                file_path,
+                pickle.dumps({**data, _SNAPSHOT_ID_KEY: snapshot_id}, protocol=pickle.HIGHEST_PROTOCOL),
+                tail_log=tail_log
+            )
+            self._snapshot_ids[mission_id] = snapshot_id
+        
+        self._last_digests[mission_id] = digests
+        self._written_stamps[mission_id] = self._disk_stamp(mission_id)
+        return True
+    
+    def _submit_write(self, op: str, mission_id: str, data: Optional[Dict[str, Any]],
+                      durable: bool) -> bool:
+        """提交写盘任务；durable为True时等待写盘完成"""
+        job = {
+            'op': op,
+            'mission_id': mission_id,
+            'data': data,
+            'done': threading.Event() if durable else None,
+            'ok': None
+        }
+        self._write_queue.put(job)
+        
+        if durable:
+            job['done'].wait()
+            return job['ok']
+        return True
+    
+    def _cache_mission(self, mission: Mission, data: Dict[str, Any]):
+        """放入任务对象缓存，超出上限时淘汰最久未使用的任务，调用方需持有self.lock"""
+        self._mission_cache[mission.mission_id] = (mission, data)
+        self._mission_cache.move_to_end(mission.mission_id)
+        if len(self._mission_cache) > self.MISSION_CACHE_SIZE:
+            evicted_id, _ = self._mission_cache.popitem(last=False)
+            self._cache_stamps.pop(evicted_id, None)
+    
+    def evict(self, mission_id: str):
+        """将任务移出对象缓存，任务执行结束后调用"""
+        with self.lock:
+            self._mission_cache.pop(mission_id, None)
+            self._cache_stamps.pop(mission_id, None)
+    
+    def _mission_exists(self, mission_id: str) -> bool:
+        """任务是否存在（包括尚未写盘的任务）"""
+        return (mission_id in self._index_cache or
+                os.path.exists(self._get_mission_file_path(mission_id)) or
+                os.path.exists(self._get_legacy_json_path(mission_id)))
+    
+    def flush(self):
+        """等待所有已提交的写盘任务完成"""
+        self._write_queue.join()
+    
+    def create_mission(self, mission: Mission, durable: bool = False) -> bool:
+        """创建新任务
+        
+        内存索引立即更新，写盘由后台线程完成；durable=True 时等待写盘完成。
+        """
         try:
-            file_path = self._get_mission_file_path(mission.mission_id)
-            
-            # 检查任务是否已存在
-            if file_path.exists():
-                logger.warning(f"任务已存在: {mission.mission_id}")
-                return False
-            
-            # 原子性写入
-            temp_file = file_path.with_suffix('.tmp')
-            
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                # 获取文件锁
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                try:
-                    f.write(mission.to_json())
-                    f.flush()
-                    os.fsync(f.fileno())
-                finally:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-            
-            # 原子性重命名
-            temp_file.rename(file_path)
-            
-            # 更新索引缓存
-            with self._cache_lock:
-                self._index_cache[mission.mission_id] = {
+            with self.lock:
+                # 检查任务是否已存在
+                if self._mission_exists(mission.mission_id):
+                    logger.warning(f"任务已存在: {mission.mission_id}")
+                    return False
+                
+                data = mission.to_dict()
+                self._pending[mission.mission_id] = data
+                self._cache_mission(mission, data)
+                
+                # 更新索引缓存
+                self._set_index_entry(mission.mission_id, {
                     'status': mission.status.value,
                     'created_at': mission.created_at,
                     'natural_language_goal': mission.natural_language_goal,
-                    'file_path': str(file_path)
-                }
+                    'file_path': self._get_mission_file_path(mission.mission_id)
+                })
+            
+            if not self._submit_write('create', mission.mission_id, data, durable):
+                return False
             
             logger.info(f"任务创建成功: {mission.mission_id}")
             return True
@@ -101,85 +464,134 @@ class MissionManager:
             logger.error(f"任务创建失败 {mission.mission_id}: {e}")
             return False
     
-    def get_mission(self, mission_id: str) -> Optional[Mission]:
-        """获取任务"""
+    def get_mission(self, mission_id: str, shared: bool = False) -> Optional[Mission]:
+        """获取任务
+        
+        默认返回最近一次写入数据的独立副本，调用方修改它不会影响其他线程。
+        shared=True 时返回缓存中的任务对象本身（与最近一次create/update_mission传入的
+        对象相同），只供执行该任务的Worker使用。未命中或任务文件已被其他实例改写时才读取任务文件。
+        """
         try:
-            file_path = self._get_mission_file_path(mission_id)
-            
-            if not file_path.exists():
-                return None
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                # 获取共享锁进行读取
-                fcntl.flock(f.fileno(), fcntl.LOCK_SH)
-                try:
-                    mission_data = json.load(f)
-                    return Mission.from_dict(mission_data)
-                finally:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            with self.lock:
+                entry = self._mission_cache.get(mission_id)
+                # 尚有待写入的数据时缓存必然最新；否则核对磁盘状态，确认没有其他实例写过
+                if entry is not None and (mission_id in self._pending or
+                                          self._cache_stamps.get(mission_id) == self._disk_stamp(mission_id)):
+                    self._mission_cache.move_to_end(mission_id)
+                    return self._resolve_cached(entry, shared)
+                if entry is not None:
+                    del self._mission_cache[mission_id]
+                
+                # 其次使用尚未写盘的最新数据
+                pending_data = self._pending.get(mission_id)
+            stamp = None
+            if pending_data is not None:
+                data = pending_data
+                mission = Mission.from_dict(copy.deepcopy(pending_data))
+            else:
+                # 先取文件状态再读取：读取期间文件若被改写，下次访问会因状态不符重新读取
+                stamp = self._disk_stamp(mission_id)
+                mission_data = self._read_snapshot(mission_id)
+                if mission_data is None:
+                    return None
+                
+                # 回放尚未合并的增量日志
+                mission_data = self._apply_tail_log(mission_id, mission_data)
+                mission = Mission.from_dict(mission_data)
+                data = mission.to_dict()
+            
+            with self.lock:
+                # 读取期间任务可能已被更新或删除，此时不缓存读到的旧数据
+                if mission_id in self._mission_cache:
+                    return self._resolve_cached(self._mission_cache[mission_id], shared)
+                entry = self._index_cache.get(mission_id)
+                if entry is not None:
+                    self._cache_mission(mission, data)
+                    if stamp is not None and mission_id not in self._pending:
+                        self._cache_stamps[mission_id] = stamp
+                        # 其他实例改变了任务状态时同步更新索引
+                        if entry['status'] != mission.status.value:
+                            self._set_index_entry(mission_id, dict(entry, status=mission.status.value))
+                    if not shared:
+                        mission = Mission.from_dict(copy.deepcopy(data))
+            return mission
                     
         except Exception as e:
             logger.error(f"任务读取失败 {mission_id}: {e}")
             return None
     
-    def update_mission(self, mission: Mission) -> bool:
-        """更新任务"""
+    @staticmethod
+    def _resolve_cached(entry: Tuple[Mission, Dict[str, Any]], shared: bool) -> Mission:
+        """按读取方式返回缓存的任务对象或其快照副本"""
+        mission, data = entry
+        if shared:
+            return mission
+        return Mission.from_dict(copy.deepcopy(data))
+    
+    def export_json(self, mission_id: str) -> Optional[str]:
+        """导出任务的JSON表示，供API和人工查看使用"""
+        mission = self.get_mission(mission_id)
+        if mission is None:
+            return None
+        return _json_dumps(mission.to_dict(), indent=True).decode('utf-8')
+    
+    def update_mission(self, mission: Mission, durable: bool = False) -> bool:
+        """更新任务
+        
+        后台线程只追加变更的顶层字段到增量日志；首次更新、进入终态或日志超过
+        TAIL_LOG_MAX_BYTES 时才重写完整的任务文件。durable=True 时等待写盘完成。
+        """
         try:
-            file_path = self._get_mission_file_path(mission.mission_id)
-            
-            if not file_path.exists():
-                logger.warning(f"任务不存在: {mission.mission_id}")
-                return False
+            mission_id = mission.mission_id
             
-            # 原子性写入
-            temp_file = file_path.with_suffix('.tmp')
-            
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                # 获取排他锁
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                try:
-                    f.write(mission.to_json())
-                    f.flush()
-                    os.fsync(f.fileno())
-                finally:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-            
-            # 原子性重命名
-            temp_file.rename(file_path)
-            
-            # 更新索引缓存
-            with self._cache_lock:
-                self._index_cache[mission.mission_id] = {
+            with self.lock:
+                if not self._mission_exists(mission_id):
+                    logger.warning(f"任务不存在: {mission_id}")
+                    return False
+                
+                data = mission.to_dict()
+                self._pending[mission_id] = data
+                self._cache_mission(mission, data)
+                
+                # 更新索引缓存
+                self._set_index_entry(mission_id, {
                     'status': mission.status.value,
                     'created_at': mission.created_at,
                     'natural_language_goal': mission.natural_language_goal,
-                    'file_path': str(file_path)
-                }
+                    'file_path': self._get_mission_file_path(mission_id)
+                })
             
-            logger.debug(f"任务更新成功: {mission.mission_id}")
+            if not self._submit_write('update', mission_id, data, durable):
+                return False
+            
+            logger.debug(f"任务更新成功: {mission_id}")
             return True
             
         except Exception as e:
             logger.error(f"任务更新失败 {mission.mission_id}: {e}")
             return False
     
-    def delete_mission(self, mission_id: str) -> bool:
+    def delete_mission(self, mission_id: str, durable: bool = False) -> bool:
         """删除任务"""
         try:
-            file_path = self._get_mission_file_path(mission_id)
-            
-            if file_path.exists():
-                file_path.unlink()
+            with self.lock:
+                if not self._mission_exists(mission_id):
+                    logger.warning(f"任务不存在: {mission_id}")
+                    return False
                 
-                # 从索引缓存中移除
-                with self._cache_lock:
-                    self._index_cache.pop(mission_id, None)
+                self._pending.pop(mission_id, None)
+                self._mission_cache.pop(mission_id, None)
+                self._cache_stamps.pop(mission_id, None)
                 
-                logger.info(f"任务删除成功: {mission_id}")
-                return True
-            else:
-                logger.warning(f"任务不存在: {mission_id}")
+                # 从索引缓存中移除
+                self._remove_index_entry(mission_id)
+            
+            # 删除操作同样排队，保证与之前的写入顺序一致
+            if not self._submit_write('delete', mission_id, None, durable):
                 return False
+            
+            logger.info(f"任务删除成功: {mission_id}")
+            return True
                 
         except Exception as e:
             logger.error(f"任务删除失败 {mission_id}: {e}")
@@ -189,38 +601,34 @@ class MissionManager:
                      limit: Optional[int] = None,
                      offset: int = 0) -> List[Dict[str, Any]]:
         """列出任务（返回基本信息，不包含完整数据）"""
-        with self._cache_lock:
-            missions = []
-            
-            for mission_id, info in self._index_cache.items():
-                if status is None or info['status'] == status.value:
-                    missions.append({
-                        'mission_id': mission_id,
-                        'status': info['status'],
-                        'created_at': info['created_at'],
-                        'natural_language_goal': info['natural_language_goal']
-                    })
-            
-            # 按创建时间倒序排列
-            missions.sort(key=lambda x: x['created_at'], reverse=True)
-            
-            # 分页
-            if offset > 0:
-                missions = missions[offset:]
-            if limit is not None:
-                missions = missions[:limit]
-            
-            return missions
+        # 读取当前快照，无需加锁
+        index_snapshot = self._index_cache
+        
+        items = index_snapshot.items()
+        if status is not None:
+            items = [item for item in items if item[1]['status'] == status.value]
+        
+        # 按创建时间倒序排列；分页时只需选出前offset+limit个，无需全量排序
+        if limit is not None:
+            items = heapq.nlargest(offset + limit, items, key=_created_at_key)[offset:]
+        else:
+            items = sorted(items, key=_created_at_key, reverse=True)[offset:]
+        
+        return [{
+            'mission_id': mission_id,
+            'status': info['status'],
+            'created_at': info['created_at'],
+            'natural_language_goal': info['natural_language_goal']
+        } for mission_id, info in items]
     
     def get_missions_by_status(self, status: MissionStatus) -> List[Mission]:
         """获取指定状态的所有任务（完整数据）"""
         missions = []
         
-        with self._cache_lock:
-            mission_ids = [
-                mission_id for mission_id, info in self._index_cache.items()
-                if info['status'] == status.value
-            ]
+        mission_ids = [
+            mission_id for mission_id, info in self._index_cache.items()
+            if info['status'] == status.value
+        ]
         
         for mission_id in mission_ids:
             mission = self.get_mission(mission_id)
@@ -231,14 +639,8 @@ class MissionManager:
     
     def count_missions_by_status(self) -> Dict[str, int]:
         """统计各状态任务数量"""
-        counts = {}
-        
         with self._cache_lock:
-            for info in self._index_cache.values():
-                status = info['status']
-                counts[status] = counts.get(status, 0) + 1
-        
-        return counts
+            return {status: count for status, count in self._status_counts.items() if count > 0}
     
     def get_recent_missions(self, limit: int = 10) -> List[Dict[str, Any]]:
         """获取最近的任务"""
@@ -246,27 +648,25 @@ class MissionManager:
     
     def search_missions(self, keyword: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """搜索任务"""
-        with self._cache_lock:
-            missions = []
-            
-            keyword_lower = keyword.lower()
-            for mission_id, info in self._index_cache.items():
-                if (keyword_lower in mission_id.lower() or 
-                    keyword_lower in info['natural_language_goal'].lower()):
-                    missions.append({
-                        'mission_id': mission_id,
-                        'status': info['status'],
-                        'created_at': info['created_at'],
-                        'natural_language_goal': info['natural_language_goal']
-                    })
-            
-            # 按创建时间倒序排列
-            missions.sort(key=lambda x: x['created_at'], reverse=True)
-            
-            if limit is not None:
-                missions = missions[:limit]
-            
-            return missions
+        index_snapshot = self._index_cache
+        missions = []
+        
+        keyword_lower = keyword.lower()
+        for mission_id, info in index_snapshot.items():
+            if (keyword_lower in mission_id.lower() or 
+                keyword_lower in info['natural_language_goal'].lower()):
+                missions.append({
+                    'mission_id': mission_id,
+                    'status': info['status'],
+                    'created_at': info['created_at'],
+                    'natural_language_goal': info['natural_language_goal']
+                })
+        
+        # 按创建时间倒序排列
+        if limit is not None:
+            return heapq.nlargest(limit, missions, key=lambda x: x['created_at'])
+        missions.sort(key=lambda x: x['created_at'], reverse=True)
+        return missions
     
     def cleanup_old_missions(self, days: int = 30) -> int:
         """清理旧任务（已完成或失败的任务）"""
@@ -277,12 +677,11 @@ class MissionManager:
         
         deleted_count = 0
         
-        with self._cache_lock:
-            mission_ids_to_delete = [
-                mission_id for mission_id, info in self._index_cache.items()
-                if (info['status'] in ['completed', 'failed'] and 
-                    info['created_at'] < cutoff_iso)
-            ]
+        mission_ids_to_delete = [
+            mission_id for mission_id, info in self._index_cache.items()
+            if (info['status'] in ['completed', 'failed'] and 
+                info['created_at'] < cutoff_iso)
+        ]
         
         for mission_id in mission_ids_to_delete:
             if self.delete_mission(mission_id):
@@ -293,17 +692,14 @@ class MissionManager:
     
     def get_statistics(self) -> Dict[str, Any]:
         """获取任务统计信息"""
-        status_counts = self.count_missions_by_status()
-        
         with self._cache_lock:
-            total_missions = len(self._index_cache)
+            # 跨天后重新计算今日任务数
+            if datetime.now().date().isoformat() != self._today_date:
+                self._recount()
             
-            # 计算今天创建的任务数
-            today = datetime.now().date().isoformat()
-            today_missions = sum(
-                1 for info in self._index_cache.values()
-                if info['created_at'].startswith(today)
-            )
+            status_counts = {status: count for status, count in self._status_counts.items() if count > 0}
+            total_missions = len(self._index_cache)
+            today_missions = self._today_count
         
         return {
             'total_missions': total_missions,
@@ -317,23 +713,54 @@ class MissionManager:
                              status_counts.get('notifying', 0)
         }
     
+    def _backup_members(self):
+        """逐个生成备份成员(成员名, JSON内容)；备份只包含JSON，不包含pickle快照"""
+        for mission_id in list(self._index_cache.keys()):
+            content = self.export_json(mission_id)
+            if content is not None:
+                yield f"{self.missions_dir.name}/{mission_id}.json", content.encode('utf-8')
+    
     def backup_missions(self, backup_dir: str) -> bool:
-        """备份所有任务数据"""
+        """备份所有任务数据（每个任务导出为一个JSON文件）"""
         try:
-            import shutil
+            # 确保排队中的写入已落盘
+            self.flush()
+            
+            import io
+            import tarfile
+            import time
             
             backup_path = Path(backup_dir)
             backup_path.mkdir(parents=True, exist_ok=True)
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = backup_path / f"missions_backup_{timestamp}.tar.gz"
             
-            shutil.make_archive(
-                str(backup_file.with_suffix('')),
-                'gztar',
-                str(self.missions_dir.parent),
-                str(self.missions_dir.name)
-            )
+            try:
+                import zstandard as zstd
+            except ImportError:
+                zstd = None
+            
+            def write_members(tar):
+                now = time.time()
+                for name, content in self._backup_members():
+                    info = tarfile.TarInfo(name)
+                    info.size = len(content)
+                    info.mtime = now
+                    tar.addfile(info, io.BytesIO(content))
+            
+            if zstd is not None:
+                # 流式写入tar并使用多线程zstd压缩，不产生中间文件
+                backup_file = backup_path / f"missions_backup_{timestamp}.tar.zst"
+                cctx = zstd.ZstdCompressor(level=3, threads=-1)
+                with open(backup_file, 'wb') as out, \
+                        cctx.stream_writer(out) as zf, \
+                        tarfile.open(mode='w|', fileobj=zf) as tar:
+                    write_members(tar)
+            else:
+                # 未安装zstandard时退回到流式gzip
+                backup_file = backup_path / f"missions_backup_{timestamp}.tar.gz"
+                with tarfile.open(str(backup_file), 'w|gz') as tar:
+                    write_members(tar)
             
             logger.info(f"任务备份完成: {backup_file}")
             return True
@@ -342,39 +769,82 @@ class MissionManager:
             logger.error(f"任务备份失败: {e}")
             return False
     
+    def _extract_backup(self, tar, target_dir: Path):
+        """校验并解出备份成员：只接受missions/<任务ID>.json形式的普通文件，内容须为任务JSON
+        
+        备份文件来自外部，不解出pickle或任何其他文件，避免反序列化执行任意代码和路径穿越。
+        """
+        prefix = self.missions_dir.name + '/'
+        for member in tar:
+            if member.isdir() and member.name.rstrip('/') == self.missions_dir.name:
+                continue
+            
+            name = member.name
+            mission_id = name[len(prefix):-len('.json')] if name.startswith(prefix) and name.endswith('.json') else ''
+            if not member.isfile() or not _MISSION_ID_PATTERN.fullmatch(mission_id):
+                raise ValueError(f"备份中包含不允许的文件: {name}")
+            
+            content = tar.extractfile(member).read()
+            data = _json_loads(content)
+            if not isinstance(data, dict) or data.get('mission_id') != mission_id:
+                raise ValueError(f"备份中的任务数据无效: {name}")
+            # 确认能够构造出任务对象
+            Mission.from_dict(copy.deepcopy(data))
+            
+            with open(target_dir / f"{mission_id}.json", 'wb') as f:
+                f.write(content)
+    
     def restore_missions(self, backup_file: str) -> bool:
-        """从备份恢复任务数据"""
+        """从备份恢复任务数据（只接受JSON格式的备份）"""
         try:
+            self.flush()
+            
             import shutil
             import tarfile
             
             # 创建临时目录
             temp_dir = self.missions_dir.parent / "temp_restore"
-            temp_dir.mkdir(exist_ok=True)
-            
-            # 解压备份文件
-            with tarfile.open(backup_file, 'r:gz') as tar:
-                tar.extractall(temp_dir)
-            
-            # 移动文件
             restored_missions_dir = temp_dir / "missions"
-            if restored_missions_dir.exists():
+            if temp_dir.exists():
+                shutil.rmtree(temp_dir)
+            restored_missions_dir.mkdir(parents=True)
+            
+            try:
+                # 逐个校验并解出备份成员
+                if str(backup_file).endswith('.zst'):
+                    import zstandard as zstd
+                    
+                    dctx = zstd.ZstdDecompressor()
+                    with open(backup_file, 'rb') as src, \
+                            dctx.stream_reader(src) as zf, \
+                            tarfile.open(mode='r|', fileobj=zf) as tar:
+                        self._extract_backup(tar, restored_missions_dir)
+                else:
+                    with tarfile.open(backup_file, 'r|gz') as tar:
+                        self._extract_backup(tar, restored_missions_dir)
+                
                 # 备份当前数据
                 current_backup = self.missions_dir.with_suffix('.backup')
                 if self.missions_dir.exists():
                     shutil.move(str(self.missions_dir), str(current_backup))
                 
-                # 恢复数据
+                # 恢复数据：以旧版JSON文件的形式放入任务目录，下次更新时自动迁移为快照
                 shutil.move(str(restored_missions_dir), str(self.missions_dir))
-                
-                # 重建索引
-                self._rebuild_index()
-                
-                # 清理临时目录
-                shutil.rmtree(temp_dir)
-                
-                logger.info(f"任务恢复完成: {backup_file}")
-                return True
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            
+            # 重建索引
+            with self.lock:
+                self._pending.clear()
+                self._mission_cache.clear()
+                self._cache_stamps.clear()
+                self._last_digests.clear()
+                self._written_stamps.clear()
+                self._snapshot_ids.clear()
+            self._rebuild_index()
+            
+            logger.info(f"任务恢复完成: {backup_file}")
+            return True
             
         except Exception as e:
             logger.error(f"任务恢复失败: {e}")
@@ -384,8 +854,7 @@ class MissionManager:
         """获取所有任务（完整数据）"""
         missions = []
         
-        with self._cache_lock:
-            mission_ids = list(self._index_cache.keys())
+        mission_ids = list(self._index_cache.keys())
         
         for mission_id in mission_ids:
             mission = self.get_mission(mission_id)
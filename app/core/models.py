@@ -2,12 +2,37 @@
 核心数据结构定义
 """
 
+import copy
 import json
-import uuid
-from datetime import datetime
+import os
+import time
 from enum import Enum
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, fields
+
+
+# 最近一次格式化的(秒, 到秒为止的ISO前缀)，同一秒内的时间戳只需拼接微秒部分
+_iso_second_cache = (None, '')
+
+
+def _now_iso() -> str:
+    """当前本地时间的ISO格式字符串，固定带微秒（与datetime.now().isoformat()格式兼容）"""
+    global _iso_second_cache
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    cached_second, prefix = _iso_second_cache
+    if cached_second != seconds:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(seconds))
+        _iso_second_cache = (seconds, prefix)
+    return f"{prefix}.{nanos // 1000:06d}"
+
+
+def _new_mission_id() -> str:
+    """生成UUIDv7格式的任务ID：前48位为毫秒时间戳，ID按字典序即按创建时间排列"""
+    b = bytearray((time.time_ns() // 1_000_000).to_bytes(6, 'big') + os.urandom(10))
+    b[6] = (b[6] & 0x0F) | 0x70  # 版本号 7
+    b[8] = (b[8] & 0x3F) | 0x80  # RFC 4122 变体
+    h = b.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
 
 class MissionStatus(Enum):
@@ -31,7 +56,12 @@ class SubtaskStatus(Enum):
     SKIPPED = "skipped"         # 跳过
 
 
-@dataclass
+# 状态转换热路径上用到的状态集合，在模块加载时构建一次
+_TERMINAL_MISSION_STATUSES = frozenset((MissionStatus.COMPLETED, MissionStatus.FAILED))
+_FINISHED_SUBTASK_STATUSES = frozenset((SubtaskStatus.COMPLETED, SubtaskStatus.FAILED, SubtaskStatus.SKIPPED))
+
+
+@dataclass(slots=True)
 class Subtask:
     """子任务数据结构"""
     subtask_id: str
@@ -44,34 +74,48 @@ class Subtask:
     created_at: str = None
     started_at: Optional[str] = None
     completed_at: Optional[str] = None
+    # to_dict结果的缓存(版本号, 字典)；修改字段后需递增_version使缓存失效，不参与序列化
+    _version: int = field(default=0, init=False, repr=False, compare=False)
+    _dict_cache: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.created_at is None:
-            self.created_at = datetime.now().isoformat()
+            self.created_at = _now_iso()
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        data = asdict(self)
+        """转换为字典
+        
+        子任务未被修改时直接返回缓存的字典，调用方不得修改返回值。
+        """
+        version = self._version
+        cached = self._dict_cache
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        data = {f.name: getattr(self, f.name) for f in _SUBTASK_FIELDS}
+        data['dependencies'] = list(self.dependencies)
         data['status'] = self.status.value
+        data['result'] = copy.deepcopy(self.result)
+        # 构建期间若子任务被修改，版本号已变化，下次调用会重新构建
+        self._dict_cache = (version, data)
         return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Subtask':
-        """从字典创建实例"""
-        data = data.copy()
-        if isinstance(data.get('status'), str):
+        """从字典创建实例（会就地修改传入的字典）"""
+        if 'status' in data:
             data['status'] = SubtaskStatus(data['status'])
         return cls(**data)
 
 
-@dataclass
+@dataclass(slots=True)
 class ReportConfig:
     """报告配置"""
     style: Optional[str] = None  # CSS样式文件名
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
-        return asdict(self)
+        return {'style': self.style}
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ReportConfig':
@@ -79,7 +123,7 @@ class ReportConfig:
         return cls(**data)
 
 
-@dataclass
+@dataclass(slots=True)
 class NotificationConfig:
     """通知配置"""
     type: str                    # 通知类型: email, slack, webhook等
@@ -88,8 +132,13 @@ class NotificationConfig:
     extra_params: Optional[Dict[str, Any]] = None  # 额外参数
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        return asdict(self)
+        """转换为字典（与asdict结果一致，只有extra_params需要深拷贝）"""
+        return {
+            'type': self.type,
+            'target': self.target,
+            'subject': self.subject,
+            'extra_params': copy.deepcopy(self.extra_params) if self.extra_params is not None else None
+        }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'NotificationConfig':
@@ -97,7 +146,7 @@ class NotificationConfig:
         return cls(**data)
 
 
-@dataclass
+@dataclass(slots=True)
 class Mission:
     """任务实体 - 系统的核心数据结构"""
     mission_id: str
@@ -107,6 +156,7 @@ class Mission:
     report_config: Optional[ReportConfig] = None
     notification_configs: List[NotificationConfig] = None
     result_page_url: Optional[str] = None
+    report_path: Optional[str] = None
     final_summary: Optional[str] = None
     created_at: str = None
     started_at: Optional[str] = None
@@ -114,21 +164,60 @@ class Mission:
     error_message: Optional[str] = None
     retry_count: int = 0
     max_retries: int = 3
+    # 子任务图的增量索引（拓扑前沿），由add_subtask/update_subtask_status维护，不参与序列化
+    _completed_ids: set = field(default_factory=set, init=False, repr=False, compare=False)
+    _subtasks_by_id: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _subtask_order: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _dependents: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _unmet_deps: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _ready_ids: set = field(default_factory=set, init=False, repr=False, compare=False)
+    _status_counts: dict = field(default_factory=dict, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.created_at is None:
-            self.created_at = datetime.now().isoformat()
+            self.created_at = _now_iso()
         if self.subtask_graph is None:
             self.subtask_graph = []
         if self.notification_configs is None:
             self.notification_configs = []
+        self._rebuild_subtask_index()
+    
+    def _rebuild_subtask_index(self):
+        """根据子任务图重建依赖索引"""
+        self._completed_ids = {task.subtask_id for task in self.subtask_graph
+                               if task.status == SubtaskStatus.COMPLETED}
+        self._subtasks_by_id = {}
+        self._subtask_order = {}
+        self._dependents = {}
+        self._unmet_deps = {}
+        self._ready_ids = set()
+        self._status_counts = dict.fromkeys(SubtaskStatus, 0)
+        for task in self.subtask_graph:
+            self._index_subtask(task)
+    
+    def _index_subtask(self, task: Subtask):
+        """将子任务加入依赖索引：记录反向依赖和未满足的依赖数"""
+        subtask_id = task.subtask_id
+        self._status_counts[task.status] += 1
+        if subtask_id in self._subtasks_by_id:
+            # 重复ID只有第一个会被update_subtask_status更新
+            return
+        
+        self._subtasks_by_id[subtask_id] = task
+        self._subtask_order[subtask_id] = len(self._subtask_order)
+        dependencies = set(task.dependencies or ())
+        for dependency in dependencies:
+            self._dependents.setdefault(dependency, []).append(subtask_id)
+        self._unmet_deps[subtask_id] = len(dependencies - self._completed_ids)
+        if task.status is SubtaskStatus.PENDING and not self._unmet_deps[subtask_id]:
+            self._ready_ids.add(subtask_id)
     
     @classmethod
     def create_new(cls, natural_language_goal: str, 
                    report_config: Optional[ReportConfig] = None,
                    notification_configs: Optional[List[NotificationConfig]] = None) -> 'Mission':
         """创建新任务"""
-        mission_id = str(uuid.uuid4())
+        mission_id = _new_mission_id()
         return cls(
             mission_id=mission_id,
             natural_language_goal=natural_language_goal,
@@ -137,8 +226,9 @@ class Mission:
         )
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        data = asdict(self)
+        """转换为字典（未修改的子任务复用缓存的字典，调用方不得修改子任务字典）"""
+        # 只浅取顶层字段：子任务和配置随后各自转换，避免asdict先深拷贝一遍整个子任务图
+        data = {f.name: getattr(self, f.name) for f in _MISSION_FIELDS}
         data['status'] = self.status.value
         data['subtask_graph'] = [subtask.to_dict() for subtask in self.subtask_graph]
         if self.report_config:
@@ -152,26 +242,22 @@ class Mission:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Mission':
-        """从字典创建实例"""
-        data = data.copy()
-        
+        """从字典创建实例（会就地修改传入的字典，调用方需传入可丢弃的字典）"""
         # 转换状态枚举
-        if isinstance(data.get('status'), str):
+        if 'status' in data:
             data['status'] = MissionStatus(data['status'])
         
         # 转换子任务图
-        if 'subtask_graph' in data and data['subtask_graph']:
-            data['subtask_graph'] = [Subtask.from_dict(subtask) for subtask in data['subtask_graph']]
+        data['subtask_graph'] = list(map(Subtask.from_dict, data.get('subtask_graph') or ()))
         
         # 转换报告配置
-        if 'report_config' in data and data['report_config']:
+        if data.get('report_config'):
             data['report_config'] = ReportConfig.from_dict(data['report_config'])
         
         # 转换通知配置
-        if 'notification_configs' in data and data['notification_configs']:
-            data['notification_configs'] = [
-                NotificationConfig.from_dict(config) for config in data['notification_configs']
-            ]
+        data['notification_configs'] = list(
+            map(NotificationConfig.from_dict, data.get('notification_configs') or ())
+        )
         
         return cls(**data)
     
@@ -186,27 +272,18 @@ class Mission:
         return [task for task in self.subtask_graph if task.status == SubtaskStatus.PENDING]
     
     def get_ready_subtasks(self) -> List[Subtask]:
-        """获取依赖已完成、可以执行的子任务"""
-        completed_tasks = {task.subtask_id for task in self.subtask_graph 
-                          if task.status == SubtaskStatus.COMPLETED}
-        
-        ready_tasks = []
-        for task in self.get_pending_subtasks():
-            if all(dep in completed_tasks for dep in task.dependencies):
-                ready_tasks.append(task)
-        
-        return ready_tasks
+        """获取依赖已完成、可以执行的子任务（按子任务图中的顺序）"""
+        return [self._subtasks_by_id[subtask_id]
+                for subtask_id in sorted(self._ready_ids, key=self._subtask_order.__getitem__)]
     
     def is_all_subtasks_completed(self) -> bool:
         """检查是否所有子任务都已完成"""
-        if not self.subtask_graph:
-            return True
-        return all(task.status in [SubtaskStatus.COMPLETED, SubtaskStatus.SKIPPED] 
-                  for task in self.subtask_graph)
+        counts = self._status_counts
+        return counts[SubtaskStatus.COMPLETED] + counts[SubtaskStatus.SKIPPED] == len(self.subtask_graph)
     
     def has_failed_subtasks(self) -> bool:
         """检查是否有失败的子任务"""
-        return any(task.status == SubtaskStatus.FAILED for task in self.subtask_graph)
+        return self._status_counts[SubtaskStatus.FAILED] > 0
     
     def update_status(self, new_status: MissionStatus, error_message: Optional[str] = None):
         """更新任务状态"""
@@ -214,10 +291,15 @@ class Mission:
         if error_message:
             self.error_message = error_message
         
-        if new_status == MissionStatus.EXECUTING and self.started_at is None:
-            self.started_at = datetime.now().isoformat()
-        elif new_status in [MissionStatus.COMPLETED, MissionStatus.FAILED]:
-            self.completed_at = datetime.now().isoformat()
+        if new_status is MissionStatus.EXECUTING and self.started_at is None:
+            self.started_at = _now_iso()
+        elif new_status in _TERMINAL_MISSION_STATUSES:
+            self.completed_at = _now_iso()
+    
+    def clear_subtasks(self):
+        """清空子任务图"""
+        self.subtask_graph = []
+        self._rebuild_subtask_index()
     
     def add_subtask(self, subagent_name: str, goal: str, dependencies: List[str] = None) -> str:
         """添加子任务"""
@@ -229,22 +311,54 @@ class Mission:
             dependencies=dependencies or []
         )
         self.subtask_graph.append(subtask)
+        self._index_subtask(subtask)
         return subtask_id
     
     def update_subtask_status(self, subtask_id: str, status: SubtaskStatus, 
                              result: Optional[Dict[str, Any]] = None,
                              error_message: Optional[str] = None):
-        """更新子任务状态"""
-        for task in self.subtask_graph:
-            if task.subtask_id == subtask_id:
-                task.status = status
-                if result is not None:
-                    task.result = result
-                if error_message:
-                    task.error_message = error_message
-                
-                if status == SubtaskStatus.IN_PROGRESS and task.started_at is None:
-                    task.started_at = datetime.now().isoformat()
-                elif status in [SubtaskStatus.COMPLETED, SubtaskStatus.FAILED, SubtaskStatus.SKIPPED]:
-                    task.completed_at = datetime.now().isoformat()
-                break
\ No newline at end of file
+        """更新子任务状态，并增量更新依赖它的子任务是否就绪"""
+        task = self._subtasks_by_id.get(subtask_id)
+        if task is None:
+            return
+        
+        old_status = task.status
+        task.status = status
+        if result is not None:
+            task.result = result
+        if error_message:
+            task.error_message = error_message
+        
+        self._status_counts[old_status] -= 1
+        self._status_counts[status] += 1
+        
+        if status == SubtaskStatus.COMPLETED and old_status != SubtaskStatus.COMPLETED:
+            self._completed_ids.add(subtask_id)
+            for dependent_id in self._dependents.get(subtask_id, ()):
+                self._unmet_deps[dependent_id] -= 1
+                if not self._unmet_deps[dependent_id] and \
+                        self._subtasks_by_id[dependent_id].status is SubtaskStatus.PENDING:
+                    self._ready_ids.add(dependent_id)
+        elif old_status == SubtaskStatus.COMPLETED and status != SubtaskStatus.COMPLETED:
+            self._completed_ids.discard(subtask_id)
+            for dependent_id in self._dependents.get(subtask_id, ()):
+                self._unmet_deps[dependent_id] += 1
+                self._ready_ids.discard(dependent_id)
+        
+        if status is SubtaskStatus.PENDING and not self._unmet_deps[subtask_id]:
+            self._ready_ids.add(subtask_id)
+        else:
+            self._ready_ids.discard(subtask_id)
+        
+        if status is SubtaskStatus.IN_PROGRESS and task.started_at is None:
+            task.started_at = _now_iso()
+        elif status in _FINISHED_SUBTASK_STATUSES:
+            task.completed_at = _now_iso()
+        
+        # 字段全部更新后再递增版本号，使缓存的字典失效
+        task._version += 1
+
+
+# Mission中参与序列化的字段（_completed_ids不参与初始化，也不序列化）
+_SUBTASK_FIELDS = tuple(f for f in fields(Subtask) if f.init)
+_MISSION_FIELDS = tuple(f for f in fields(Mission) if f.init)
@@ -2,18 +2,292 @@
 通知管理器 - 支持多种通知渠道的统一接口
 """
 
+import atexit
+import hashlib
+import itertools
 import logging
+import queue
+import random
+import re
 import smtplib
+import socket
 import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from abc import ABC, abstractmethod
+from collections import deque
 from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
 from datetime import datetime
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email import policy as email_policy
+from email.message import EmailMessage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 logger = logging.getLogger(__name__)
 
+# 发送路径上使用的常量表，避免每次调用重新构造
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+_EMAIL_REQUIRED_FIELDS = ('username', 'password')
+_SLACK_POST_MESSAGE_URL = "https://slack.com/api/chat.postMessage"
+
+# 任务通知消息模板
+_MISSION_MESSAGE_HEADER = "任务通知\\n\\n任务ID: {}\\n任务目标: {}\\n当前状态: {}\\n"
+_MISSION_MESSAGE_OPTIONAL_LINES = (
+    ('completed_at', "完成时间: {}\\n"),
+    ('final_summary', "\\n任务总结:\\n{}\\n"),
+    ('result_page_url', "\\n详细报告: {}\\n"),
+)
+
+# 可重连重试的SMTP瞬时错误
+_SMTP_TRANSIENT_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    socket.timeout,
+    ConnectionError
+)
+
+# Webhook载荷模板变量，如 {{message}}
+_TEMPLATE_VAR_RE = re.compile(r'\{\{(\w+)\}\}')
+
+
+def _fingerprint(text: str) -> str:
+    """计算去重用的非加密指纹，优先使用xxhash"""
+    data = text.encode('utf-8')
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _json_dumps(payload: Any) -> bytes:
+    """序列化请求载荷为JSON字节串，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+class SMTPConnectionPool:
+    """SMTP连接池 - 复用已完成TLS握手和登录的会话
+    
+    连接在发送消息数达到上限或空闲超过idle_timeout后回收，避免服务端
+    主动断开长连接或按连接限流导致发送中途失败。
+    """
+    
+    def __init__(self, pool_size: int = 4, max_messages_per_conn: int = 1000,
+                 idle_timeout: float = 60.0):
+        self.pool_size = pool_size
+        self.max_messages_per_conn = max_messages_per_conn
+        self.idle_timeout = idle_timeout
+        self._pools: Dict[tuple, queue.Queue] = {}
+        self._lock = threading.Lock()
+        # 每个连接的 (最后使用时间, 已发送消息数)
+        self._conn_stats: Dict[int, List[float]] = {}
+        self._pruner: Optional[threading.Thread] = None
+    
+    def _get_queue(self, key: tuple) -> queue.Queue:
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = queue.Queue(maxsize=self.pool_size)
+            return pool
+    
+    @staticmethod
+    def _connect(key: tuple, password: str) -> smtplib.SMTP:
+        """建立新连接并完成握手和认证"""
+        host, port, username, use_tls = key
+        conn = smtplib.SMTP(host, port, timeout=30)
+        if use_tls:
+            conn.starttls()
+        conn.login(username, password)
+        return conn
+    
+    def _discard(self, conn: smtplib.SMTP):
+        """关闭并丢弃连接"""
+        self._conn_stats.pop(id(conn), None)
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    
+    def _is_expired(self, conn: smtplib.SMTP, now: float) -> bool:
+        """连接是否空闲过久"""
+        last_used, _ = self._conn_stats.get(id(conn), (0.0, 0))
+        return now - last_used > self.idle_timeout
+    
+    def acquire(self, key: tuple, password: str) -> smtplib.SMTP:
+        """获取可用连接，池中连接失效或过期时重新建立"""
+        pool = self._get_queue(key)
+        
+        while True:
+            try:
+                conn = pool.get_nowait()
+            except queue.Empty:
+                break
+            
+            if self._is_expired(conn, time.monotonic()):
+                self._discard(conn)
+                continue
+            
+            # 健康检查
+            try:
+                code, _ = conn.noop()
+                if code == 250:
+                    return conn
+            except smtplib.SMTPException:
+                pass
+            self._discard(conn)
+        
+        conn = self._connect(key, password)
+        self._conn_stats[id(conn)] = [time.monotonic(), 0]
+        return conn
+    
+    def release(self, key: tuple, conn: smtplib.SMTP, healthy: bool = True, sent: int = 1,
+                max_messages: Optional[int] = None):
+        """归还连接；发送次数达到上限或连接异常时直接关闭"""
+        stats = self._conn_stats.setdefault(id(conn), [0.0, 0])
+        stats[0] = time.monotonic()
+        stats[1] += sent
+        
+        if not healthy or stats[1] >= (max_messages or self.max_messages_per_conn):
+            self._discard(conn)
+            return
+        
+        try:
+            self._get_queue(key).put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+            return
+        
+        self._ensure_pruner()
+    
+    def _ensure_pruner(self):
+        """按需启动空闲连接清理线程"""
+        with self._lock:
+            if self._pruner is not None:
+                return
+            self._pruner = threading.Thread(
+                target=self._prune_loop, name="smtp-pool-pruner", daemon=True
+            )
+            self._pruner.start()
+    
+    def _prune_loop(self):
+        """定期关闭空闲超时的连接"""
+        while True:
+            time.sleep(self.idle_timeout / 2)
+            self.prune_idle()
+    
+    def prune_idle(self):
+        """关闭所有空闲超时的池内连接"""
+        with self._lock:
+            pools = list(self._pools.values())
+        
+        now = time.monotonic()
+        for pool in pools:
+            keep = []
+            while True:
+                try:
+                    conn = pool.get_nowait()
+                except queue.Empty:
+                    break
+                if self._is_expired(conn, now):
+                    self._discard(conn)
+                else:
+                    keep.append(conn)
+            
+            for conn in keep:
+                try:
+                    pool.put_nowait(conn)
+                except queue.Full:
+                    self._discard(conn)
+    
+    def close_all(self):
+        """关闭池中的所有连接"""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        
+        for pool in pools:
+            while True:
+                try:
+                    conn = pool.get_nowait()
+                except queue.Empty:
+                    break
+                self._discard(conn)
+
+
+# 进程内共享的SMTP连接池
+smtp_pool = SMTPConnectionPool()
+atexit.register(smtp_pool.close_all)
+
+
+def _create_http_session() -> requests.Session:
+    """创建带连接池和重试策略的HTTP会话"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['POST', 'GET'],
+            respect_retry_after_header=True
+        )
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# 进程内共享的HTTP会话，复用TCP/TLS连接
+http_session = _create_http_session()
+
+
+# 邮件正文模板在导入时构建并切分为固定片段，发送时只拼接变量部分
+_EMAIL_HTML_HEAD, _EMAIL_HTML_MID, _EMAIL_HTML_TAIL = """
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <style>
+                    body { font-family: Arial, sans-serif; }
+                    .header { background: #667eea; color: white; padding: 20px; text-align: center; }
+                    .content { padding: 20px; }
+                    .footer { background: #f8f9fa; padding: 10px; text-align: center; font-size: 12px; color: #666; }
+                </style>
+            </head>
+            <body>
+                <div class="header">
+                    <h2>MyHelper 任务通知</h2>
+                </div>
+                <div class="content">
+                    \0
+                </div>
+                <div class="footer">
+                    <p>发送时间: \0</p>
+                    <p>Powered by MyHelper - 智能任务自动化平台</p>
+                </div>
+            </body>
+            </html>
+            """.split('\0')
+
+_EMAIL_TEXT_MID = "\n\n发送时间: "
+_EMAIL_TEXT_TAIL = "\nPowered by MyHelper"
+
 
 class NotificationDriver(ABC):
     """通知驱动基类"""
@@ -34,81 +308,103 @@ class EmailDriver(NotificationDriver):
     
     def send(self, message: str, target: str, config: Dict[str, Any]) -> bool:
         """发送邮件通知"""
+        return self.send_batch(message, [target], config).get(target, False)
+    
+    @staticmethod
+    def pool_key(config: Dict[str, Any]) -> tuple:
+        """连接池键：相同键的收件人可共用一个SMTP会话"""
+        return (
+            config.get('smtp_server', 'smtp.gmail.com'),
+            config.get('smtp_port', 587),
+            config.get('username'),
+            config.get('use_tls', True)
+        )
+    
+    def send_batch(self, message: str, targets: List[str], config: Dict[str, Any]) -> Dict[str, bool]:
+        """通过同一个SMTP会话向多个收件人发送邮件"""
+        results = {target: False for target in targets}
+        
+        username = config.get('username')
+        password = config.get('password')
+        from_email = config.get('from_email', username)
+        
+        if not username or not password:
+            logger.error("邮件配置缺少用户名或密码")
+            return results
+        
+        # 邮件内容与收件人无关，只格式化一次
+        body = self._format_email_content(message, config)
+        subtype = 'html' if config.get('html', True) else 'plain'
+        subject = config.get('subject', 'MyHelper 任务通知')
+        
+        # 通过连接池发送邮件，避免每次重新握手和登录
+        pool_key = self.pool_key(config)
+        max_retries = config.get('max_retries', 3)
+        backoff = config.get('retry_backoff', 0.5)
+        server = None
+        sent = 0
+        
         try:
-            # 邮件服务器配置
-            smtp_server = config.get('smtp_server', 'smtp.gmail.com')
-            smtp_port = config.get('smtp_port', 587)
-            username = config.get('username')
-            password = config.get('password')
-            from_email = config.get('from_email', username)
-            
-            if not username or not password:
-                logger.error("邮件配置缺少用户名或密码")
-                return False
-            
-            # 创建邮件
-            msg = MIMEMultipart()
-            msg['From'] = from_email
-            msg['To'] = target
-            msg['Subject'] = config.get('subject', 'MyHelper 任务通知')
-            
-            # 添加邮件内容
-            body = self._format_email_content(message, config)
-            msg.attach(MIMEText(body, 'html' if config.get('html', True) else 'plain'))
-            
-            # 发送邮件
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                server.login(username, password)
-                server.send_message(msg)
-            
-            logger.info(f"邮件发送成功: {target}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"邮件发送失败: {e}")
-            return False
+            for target in targets:
+                # 创建邮件（只有正文一个部分，无需multipart封装）
+                msg = EmailMessage(policy=email_policy.default)
+                msg['From'] = from_email
+                msg['To'] = target
+                msg['Subject'] = subject
+                msg.set_content(body, subtype=subtype)
+                
+                for attempt in range(max_retries + 1):
+                    try:
+                        if server is None:
+                            server = smtp_pool.acquire(pool_key, password)
+                            sent = 0
+                        
+                        # 同一会话内连续发送，smtplib在每封邮件之间自动复位事务
+                        server.send_message(msg)
+                        results[target] = True
+                        sent += 1
+                        logger.info("邮件发送成功: %s", target)
+                        break
+                    except _SMTP_TRANSIENT_ERRORS as e:
+                        # 连接失效：丢弃后按指数退避加随机抖动重连
+                        if server is not None:
+                            smtp_pool.release(pool_key, server, healthy=False)
+                            server = None
+                        
+                        if attempt >= max_retries:
+                            logger.error("邮件发送失败: %s", e)
+                            break
+                        
+                        delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+                        logger.warning("邮件发送暂时失败，%.1f秒后重试: %s", delay, e)
+                        time.sleep(delay)
+                    except Exception as e:
+                        logger.error("邮件发送失败: %s", e)
+                        break
+        finally:
+            if server is not None:
+                smtp_pool.release(pool_key, server, sent=max(sent, 1),
+                                  max_messages=config.get('max_msgs_per_conn'))
+        
+        return results
     
     def validate_config(self, config: Dict[str, Any]) -> bool:
         """验证邮件配置"""
-        required_fields = ['username', 'password']
-        return all(field in config for field in required_fields)
+        return all(field in config for field in _EMAIL_REQUIRED_FIELDS)
     
     def _format_email_content(self, message: str, config: Dict[str, Any]) -> str:
         """格式化邮件内容"""
+        sent_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         if config.get('html', True):
-            return f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; }}
-                    .header {{ background: #667eea; color: white; padding: 20px; text-align: center; }}
-                    .content {{ padding: 20px; }}
-                    .footer {{ background: #f8f9fa; padding: 10px; text-align: center; font-size: 12px; color: #666; }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h2>MyHelper 任务通知</h2>
-                </div>
-                <div class="content">
-                    {message}
-                </div>
-                <div class="footer">
-                    <p>发送时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-                    <p>Powered by MyHelper - 智能任务自动化平台</p>
-                </div>
-            </body>
-            </html>
-            """
-        else:
-            return f"{message}\n\n发送时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\nPowered by MyHelper"
+            return ''.join((_EMAIL_HTML_HEAD, message, _EMAIL_HTML_MID, sent_at, _EMAIL_HTML_TAIL))
+        return ''.join((message, _EMAIL_TEXT_MID, sent_at, _EMAIL_TEXT_TAIL))
 
 
 class SlackDriver(NotificationDriver):
     """Slack通知驱动"""
     
+    _session = http_session
+    
     def send(self, message: str, target: str, config: Dict[str, Any]) -> bool:
         """发送Slack通知"""
         try:
@@ -124,7 +420,7 @@ class SlackDriver(NotificationDriver):
                 return False
                 
         except Exception as e:
-            logger.error(f"Slack发送失败: {e}")
+            logger.error("Slack发送失败: %s", e)
             return False
     
     def validate_config(self, config: Dict[str, Any]) -> bool:
@@ -147,15 +443,15 @@ class SlackDriver(NotificationDriver):
             ]
         }
         
-        response = requests.post(webhook_url, json=payload, timeout=10)
+        response = self._session.post(webhook_url, data=_json_dumps(payload),
+                                      headers=_JSON_HEADERS, timeout=10)
         response.raise_for_status()
         
-        logger.info(f"Slack Webhook发送成功: {target}")
+        logger.info("Slack Webhook发送成功: %s", target)
         return True
     
     def _send_via_api(self, message: str, target: str, bot_token: str, config: Dict[str, Any]) -> bool:
         """通过API发送"""
-        url = "https://slack.com/api/chat.postMessage"
         headers = {
             "Authorization": f"Bearer {bot_token}",
             "Content-Type": "application/json"
@@ -168,42 +464,50 @@ class SlackDriver(NotificationDriver):
             "icon_emoji": config.get('icon_emoji', ':robot_face:')
         }
         
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
+        response = self._session.post(_SLACK_POST_MESSAGE_URL, headers=headers, data=_json_dumps(payload), timeout=10)
         response.raise_for_status()
         
         result = response.json()
         if not result.get('ok'):
             raise Exception(f"Slack API错误: {result.get('error')}")
         
-        logger.info(f"Slack API发送成功: {target}")
+        logger.info("Slack API发送成功: %s", target)
         return True
 
 
 class WebhookDriver(NotificationDriver):
     """Webhook通知驱动"""
     
+    _session = http_session
+    
     def send(self, message: str, target: str, config: Dict[str, Any]) -> bool:
         """发送Webhook通知"""
         try:
             method = config.get('method', 'POST').upper()
-            headers = config.get('headers', {'Content-Type': 'application/json'})
+            headers = config.get('headers', _JSON_HEADERS)
             
             # 准备请求数据
             payload = self._prepare_payload(message, target, config)
             
             # 发送请求
             if method == 'GET':
-                response = requests.get(target, params=payload, headers=headers, timeout=10)
+                response = self._session.get(target, params=payload, headers=headers, timeout=10)
             else:
-                response = requests.post(target, json=payload, headers=headers, timeout=10)
+                # 预先编码请求体，绕过requests内部的标准库json序列化
+                response = self._session.post(
+                    target,
+                    data=_json_dumps(payload),
+                    headers={**headers, 'Content-Type': 'application/json'},
+                    timeout=10
+                )
             
             response.raise_for_status()
             
-            logger.info(f"Webhook发送成功: {target}")
+            logger.info("Webhook发送成功: %s", target)
             return True
             
         except Exception as e:
-            logger.error(f"Webhook发送失败: {e}")
+            logger.error("Webhook发送失败: %s", e)
             return False
     
     def validate_config(self, config: Dict[str, Any]) -> bool:
@@ -212,18 +516,32 @@ class WebhookDriver(NotificationDriver):
     
     def _prepare_payload(self, message: str, target: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """准备请求载荷"""
-        template = config.get('payload_template', {
-            'message': message,
-            'timestamp': datetime.now().isoformat(),
-            'source': 'MyHelper'
-        })
+        # 同一次发送的所有字段共用一个时间戳
+        timestamp = datetime.now().isoformat()
+        
+        template = config.get('payload_template')
+        if template is None:
+            return {
+                'message': message,
+                'timestamp': timestamp,
+                'source': 'MyHelper'
+            }
         
-        # 支持模板变量替换
+        # 支持模板变量替换，未知变量保持原样
         if isinstance(template, dict):
+            variables = {
+                'message': message,
+                'timestamp': timestamp,
+                'target': target,
+                'source': 'MyHelper'
+            }
+            replace = lambda m: variables.get(m.group(1), m.group(0))
+            
             payload = {}
             for key, value in template.items():
-                if isinstance(value, str):
-                    payload[key] = value.replace('{{message}}', message).replace('{{timestamp}}', datetime.now().isoformat())
+                # 不含占位符的字段直接复用，不进入正则替换
+                if isinstance(value, str) and '{{' in value:
+                    payload[key] = _TEMPLATE_VAR_RE.sub(replace, value)
                 else:
                     payload[key] = value
             return payload
@@ -242,7 +560,7 @@ class ConsoleDriver(NotificationDriver):
             logger.info(formatted_message)
             return True
         except Exception as e:
-            logger.error(f"控制台输出失败: {e}")
+            logger.error("控制台输出失败: %s", e)
             return False
     
     def validate_config(self, config: Dict[str, Any]) -> bool:
@@ -253,6 +571,12 @@ class ConsoleDriver(NotificationDriver):
 class NotificationManager:
     """通知管理器 - 统一管理各种通知驱动"""
     
+    # 待合并历史记录达到该数量时由发送线程顺带合并
+    HISTORY_DRAIN_BATCH = 64
+    
+    # 成功率统计覆盖最近的通知条数
+    RECENT_STATS_WINDOW = 10
+    
     def __init__(self, config_manager):
         self.config_manager = config_manager
         
@@ -264,21 +588,141 @@ class NotificationManager:
             'console': ConsoleDriver()
         }
         
-        # 通知历史记录
-        self.notification_history = []
+        # 通知历史记录（有界队列，超出容量时自动淘汰最旧记录）
+        self.notification_history = deque(
+            maxlen=self.config_manager.get('notifications.max_history', 1000)
+        )
+        self._history_lock = threading.Lock()
+        # 发送路径只向无锁队列投递记录，由读取方或批量阈值触发合并
+        self._history_queue: queue.SimpleQueue = queue.SimpleQueue()
+        # 最近RECENT_STATS_WINDOW条通知的结果及其中成功的数量，随合并增量维护（受_history_lock保护）
+        self._recent_outcomes: deque = deque(maxlen=self.RECENT_STATS_WINDOW)
+        self._recent_success = 0
+        
+        # 并发发送：线程池按需创建，信号量限制同时进行的外部请求数
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # 任务通知的整体编排（等待各渠道结果）在独立线程池中进行，不占用发送线程
+        self._mission_executor: Optional[ThreadPoolExecutor] = None
+        self._send_semaphore = threading.BoundedSemaphore(
+            self.config_manager.get('notifications.max_concurrent', 8)
+        )
+        # 按目标主机限制并发，避免触发单个服务端的连接数或登录频率限制
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_semaphores_lock = threading.Lock()
+        
+        # 后台发送队列：紧急通知优先出队，同优先级按提交顺序
+        self._send_queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._send_seq = itertools.count()
+        self._send_workers: List[threading.Thread] = []
+        self._send_workers_lock = threading.Lock()
+        
+        # 正在发送中的通知，相同内容的并发请求等待首个请求的结果
+        self._inflight: Dict[str, Dict[str, Any]] = {}
+        self._inflight_lock = threading.Lock()
         
         logger.info("NotificationManager初始化完成")
     
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """获取发送线程池"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=8, thread_name_prefix="notification"
+                )
+            return self._executor
+    
+    def _get_mission_executor(self) -> ThreadPoolExecutor:
+        """获取任务通知编排线程池"""
+        with self._executor_lock:
+            if self._mission_executor is None:
+                self._mission_executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="mission-notification"
+                )
+            return self._mission_executor
+    
+    def _ensure_send_workers(self):
+        """按需启动后台发送线程"""
+        with self._send_workers_lock:
+            if self._send_workers:
+                return
+            
+            for i in range(self.config_manager.get('notifications.workers', 2)):
+                worker = threading.Thread(
+                    target=self._send_worker_loop,
+                    name=f"notification-sender-{i}",
+                    daemon=True
+                )
+                worker.start()
+                self._send_workers.append(worker)
+    
+    def _send_worker_loop(self):
+        """后台发送线程主循环"""
+        while True:
+            _, _, args, future = self._send_queue.get()
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(self.send_notification(*args))
+                except Exception as e:
+                    future.set_exception(e)
+            finally:
+                self._send_queue.task_done()
+    
+    def send_notification_async(self, notification_type: str, target: str, message: str,
+                                config: Optional[Dict[str, Any]] = None,
+                                urgent: bool = False) -> Future:
+        """提交通知到后台队列，立即返回Future；urgent=True时优先发送"""
+        self._ensure_send_workers()
+        
+        future: Future = Future()
+        priority = 0 if urgent else 1
+        self._send_queue.put((
+            priority,
+            next(self._send_seq),
+            (notification_type, target, message, config),
+            future
+        ))
+        return future
+    
     def send_notification(self, notification_type: str, target: str, message: str, 
                          config: Optional[Dict[str, Any]] = None) -> bool:
-        """发送通知"""
+        """发送通知；相同类型、目标和内容的并发通知只实际发送一次"""
+        key = _fingerprint(f"{notification_type}|{target}|{message}")
+        
+        with self._inflight_lock:
+            entry = self._inflight.get(key)
+            if entry is None:
+                entry = self._inflight[key] = {'event': threading.Event(), 'result': False}
+                owner = True
+            else:
+                owner = False
+        
+        if not owner:
+            logger.info("合并重复通知: %s -> %s", notification_type, target)
+            timeout = self.config_manager.get('notifications.timeout', 60)
+            entry['event'].wait(timeout)
+            return entry['result']
+        
+        try:
+            entry['result'] = self._send_notification(notification_type, target, message, config)
+            return entry['result']
+        finally:
+            entry['event'].set()
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+    
+    def _send_notification(self, notification_type: str, target: str, message: str,
+                           config: Optional[Dict[str, Any]] = None) -> bool:
+        """实际执行通知发送"""
         try:
-            logger.info(f"发送通知: {notification_type} -> {target}")
+            logger.info("发送通知: %s -> %s", notification_type, target)
             
             # 获取驱动
             driver = self.drivers.get(notification_type.lower())
             if not driver:
-                logger.error(f"不支持的通知类型: {notification_type}")
+                logger.error("不支持的通知类型: %s", notification_type)
                 return False
             
             # 获取配置
@@ -286,11 +730,13 @@ class NotificationManager:
             
             # 验证配置
             if not driver.validate_config(driver_config):
-                logger.error(f"通知配置无效: {notification_type}")
+                logger.error("通知配置无效: %s", notification_type)
                 return False
             
             # 发送通知
-            success = driver.send(message, target, driver_config)
+            host_semaphore = self._get_host_semaphore(notification_type.lower(), target, driver_config)
+            with host_semaphore, self._send_semaphore:
+                success = driver.send(message, target, driver_config)
             
             # 记录历史
             self._record_notification(notification_type, target, message, success)
@@ -298,7 +744,7 @@ class NotificationManager:
             return success
             
         except Exception as e:
-            logger.error(f"发送通知失败: {e}")
+            logger.error("发送通知失败: %s", e)
             return False
     
     def send_mission_notification(self, mission_data: Dict[str, Any], 
@@ -310,81 +756,208 @@ class NotificationManager:
             # 准备通知消息
             message = self._prepare_mission_message(mission_data)
             
-            # 逐个发送通知
+            # 共用SMTP服务器和账号的邮件收件人合并到同一个会话中发送
+            email_buckets: Dict[tuple, Dict[str, Any]] = {}
+            other_configs = []
+            
             for config in notification_configs:
                 notification_type = config.get('type')
                 target = config.get('target')
                 
                 if not notification_type or not target:
-                    logger.warning(f"通知配置不完整: {config}")
+                    logger.warning("通知配置不完整: %s", config)
                     continue
                 
-                success = self.send_notification(
-                    notification_type=notification_type,
-                    target=target,
-                    message=message,
-                    config=config.get('config', {})
+                if notification_type.lower() == 'email':
+                    driver_config = config.get('config') or self._get_notification_config('email')
+                    bucket = email_buckets.setdefault(
+                        EmailDriver.pool_key(driver_config),
+                        {'config': driver_config, 'targets': []}
+                    )
+                    bucket['targets'].append(target)
+                else:
+                    other_configs.append(config)
+            
+            # 各渠道并发发送，总耗时取决于最慢的一个；失败任务的通知优先发送
+            executor = self._get_executor()
+            urgent = mission_data.get('status') == 'failed'
+            futures = {}
+            
+            for bucket in email_buckets.values():
+                future = executor.submit(
+                    self._send_email_batch, message, bucket['targets'], bucket['config']
                 )
+                futures[future] = [f"email:{target}" for target in bucket['targets']]
+            
+            for config in other_configs:
+                notification_type = config.get('type')
+                target = config.get('target')
                 
-                results[f"{notification_type}:{target}"] = success
+                future = self.send_notification_async(
+                    notification_type, target, message, config.get('config', {}), urgent=urgent
+                )
+                futures[future] = [f"{notification_type}:{target}"]
+            
+            timeout = self.config_manager.get('notifications.timeout', 60)
+            try:
+                for future in as_completed(futures, timeout=timeout):
+                    try:
+                        result = future.result()
+                        if isinstance(result, dict):
+                            results.update(result)
+                        else:
+                            results[futures[future][0]] = result
+                    except Exception as e:
+                        logger.error("通知发送异常: %s", e)
+                        results.update(dict.fromkeys(futures[future], False))
+            except FutureTimeoutError:
+                logger.warning("部分通知发送超时（%s秒）", timeout)
+            
+            # 超时或异常的通知记为失败
+            for keys in futures.values():
+                for key in keys:
+                    results.setdefault(key, False)
             
             return results
             
         except Exception as e:
-            logger.error(f"发送任务通知失败: {e}")
+            logger.error("发送任务通知失败: %s", e)
             return {}
     
+    def send_mission_notification_async(self, mission_data: Dict[str, Any],
+                                        notification_configs: List[Dict[str, Any]]) -> Future:
+        """在后台发送任务相关通知，立即返回Future，结果与send_mission_notification相同"""
+        return self._get_mission_executor().submit(
+            self.send_mission_notification, mission_data, notification_configs
+        )
+    
+    @staticmethod
+    def _resolve_host(notification_type: str, target: str, config: Dict[str, Any]) -> str:
+        """解析通知实际连接的主机"""
+        if notification_type == 'email':
+            return config.get('smtp_server', 'smtp.gmail.com')
+        if notification_type == 'slack':
+            webhook_url = config.get('webhook_url')
+            return urlparse(webhook_url).netloc if webhook_url else urlparse(_SLACK_POST_MESSAGE_URL).netloc
+        if notification_type == 'webhook':
+            return urlparse(target).netloc or target
+        return notification_type
+    
+    def _get_host_semaphore(self, notification_type: str, target: str,
+                            config: Dict[str, Any]) -> threading.BoundedSemaphore:
+        """获取目标主机的并发信号量，不存在时按配置创建"""
+        host = self._resolve_host(notification_type, target, config)
+        
+        with self._host_semaphores_lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                limit = self.config_manager.get(f'notifications.{notification_type}.max_concurrent', 5)
+                semaphore = self._host_semaphores[host] = threading.BoundedSemaphore(limit)
+            return semaphore
+    
+    def _send_email_batch(self, message: str, targets: List[str],
+                          config: Dict[str, Any]) -> Dict[str, bool]:
+        """批量发送邮件并记录历史"""
+        driver = self.drivers.get('email')
+        
+        if isinstance(driver, EmailDriver) and driver.validate_config(config):
+            host_semaphore = self._get_host_semaphore('email', targets[0], config)
+            with host_semaphore, self._send_semaphore:
+                batch_results = driver.send_batch(message, targets, config)
+        else:
+            # 自定义邮件驱动或配置无效时逐个发送
+            return {
+                f"email:{target}": self.send_notification('email', target, message, config)
+                for target in targets
+            }
+        
+        results = {}
+        timestamp = time.time()
+        for target, success in batch_results.items():
+            self._record_notification('email', target, message, success, timestamp)
+            results[f"email:{target}"] = success
+        return results
+    
     def _get_notification_config(self, notification_type: str) -> Dict[str, Any]:
         """获取通知配置"""
         return self.config_manager.get(f'notifications.{notification_type}', {})
     
     def _prepare_mission_message(self, mission_data: Dict[str, Any]) -> str:
         """准备任务通知消息"""
-        mission_id = mission_data.get('mission_id', '未知')
-        goal = mission_data.get('natural_language_goal', '未知任务')
-        status = mission_data.get('status', '未知状态')
-        
         # 基础消息
-        message = f"任务通知\\n\\n"
-        message += f"任务ID: {mission_id}\\n"
-        message += f"任务目标: {goal}\\n"
-        message += f"当前状态: {status}\\n"
-        
-        # 添加时间信息
-        if mission_data.get('completed_at'):
-            message += f"完成时间: {mission_data['completed_at']}\\n"
-        
-        # 添加总结信息
-        if mission_data.get('final_summary'):
-            message += f"\\n任务总结:\\n{mission_data['final_summary']}\\n"
+        parts = [_MISSION_MESSAGE_HEADER.format(
+            mission_data.get('mission_id', '未知'),
+            mission_data.get('natural_language_goal', '未知任务'),
+            mission_data.get('status', '未知状态')
+        )]
         
-        # 添加报告链接
-        if mission_data.get('result_page_url'):
-            message += f"\\n详细报告: {mission_data['result_page_url']}\\n"
+        # 按需追加完成时间、任务总结和报告链接
+        for field_name, template in _MISSION_MESSAGE_OPTIONAL_LINES:
+            value = mission_data.get(field_name)
+            if value:
+                parts.append(template.format(value))
         
-        return message
+        return ''.join(parts)
     
     def _record_notification(self, notification_type: str, target: str, 
-                           message: str, success: bool):
-        """记录通知历史"""
+                           message: str, success: bool, timestamp: Optional[float] = None):
+        """记录通知历史；时间先存为时间戳，读取历史时才格式化"""
         record = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp or time.time(),
             'type': notification_type,
             'target': target,
             'message': message[:100] + '...' if len(message) > 100 else message,
             'success': success
         }
         
-        self.notification_history.append(record)
+        self._history_queue.put_nowait(record)
         
-        # 保持历史记录数量
-        max_history = self.config_manager.get('notifications.max_history', 1000)
-        if len(self.notification_history) > max_history:
-            self.notification_history = self.notification_history[-max_history:]
+        # 积压较多时顺手合并；锁被占用说明已有线程在合并，直接返回
+        if self._history_queue.qsize() >= self.HISTORY_DRAIN_BATCH:
+            if self._history_lock.acquire(blocking=False):
+                try:
+                    self._drain_history()
+                finally:
+                    self._history_lock.release()
+    
+    def _drain_history(self):
+        """将待合并的记录移入历史队列，调用方需持有_history_lock"""
+        outcomes = self._recent_outcomes
+        while True:
+            try:
+                record = self._history_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.notification_history.append(record)
+            
+            success = bool(record['success'])
+            if len(outcomes) == outcomes.maxlen:
+                self._recent_success -= outcomes[0]
+            outcomes.append(success)
+            self._recent_success += success
     
     def get_notification_history(self, limit: int = 50) -> List[Dict[str, Any]]:
         """获取通知历史"""
-        return self.notification_history[-limit:]
+        with self._history_lock:
+            self._drain_history()
+            history = self.notification_history
+            records = list(itertools.islice(history, max(0, len(history) - limit), None))
+            
+            # 只格式化实际被读取的记录，格式化结果写回记录供下次复用
+            for record in records:
+                if isinstance(record['timestamp'], float):
+                    record['timestamp'] = datetime.fromtimestamp(record['timestamp']).isoformat()
+            return records
+    
+    def get_recent_stats(self) -> Dict[str, Any]:
+        """最近RECENT_STATS_WINDOW条通知的数量和成功率"""
+        with self._history_lock:
+            self._drain_history()
+            count = len(self._recent_outcomes)
+            return {
+                'recent_count': count,
+                'success_rate': self._recent_success / count if count else 0
+            }
     
     def get_available_drivers(self) -> List[str]:
         """获取可用驱动列表"""
@@ -393,7 +966,7 @@ class NotificationManager:
     def register_driver(self, name: str, driver: NotificationDriver):
         """注册自定义驱动"""
         self.drivers[name] = driver
-        logger.info(f"注册通知驱动: {name}")
+        logger.info("注册通知驱动: %s", name)
     
     def test_notification(self, notification_type: str, target: str) -> bool:
         """测试通知配置"""
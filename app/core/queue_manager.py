@@ -2,23 +2,166 @@
 队列管理器 - 基于文件系统的持久化任务队列
 """
 
+import json
 import os
+import sqlite3
 import threading
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Literal, Tuple
 import logging
 import time
-import fcntl
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# 写入持久化级别：sync=fsync，data=fdatasync，none=只依赖原子重命名
+Durability = Literal['sync', 'data', 'none']
+
+
+def _json_dumps(data: Any) -> bytes:
+    """序列化为UTF-8编码的JSON，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+def _json_loads(data):
+    """反序列化JSON，优先使用orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _fsync_directory(directory: Path):
+    """同步目录项，保证重命名在崩溃后仍然可见"""
+    try:
+        fd = os.open(str(directory), os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        logger.warning(f"目录同步失败 {directory}: {e}")
+
+
+class GroupCommit:
+    """组提交协调器 - 合并并发写入的落盘操作
+    
+    第一个到达的写入者成为leader，在短暂的时间窗口内收集其他写入者提交的
+    文件，统一写入、重命名，并对所在目录只执行一次fsync；其余写入者等待
+    leader完成后直接返回结果。
+    """
+    
+    def __init__(self, max_batch: int = 8, window: float = 0.0005):
+        self.max_batch = max_batch
+        self.window = window
+        self._cond = threading.Condition()
+        self._pending: List[Dict[str, Any]] = []
+        self._leader_active = False
+    
+    def commit(self, temp_path: Path, final_path: Path, payload: bytes,
+               durability: Durability = 'data', sync_dir: bool = True) -> bool:
+        """提交一个文件写入，返回是否成功落盘"""
+        item = {'temp': temp_path, 'final': final_path, 'payload': payload,
+                'durability': durability, 'sync_dir': sync_dir,
+                'done': False, 'ok': False}
+        
+        with self._cond:
+            self._pending.append(item)
+            if self._leader_active:
+                # 跟随者：等待leader完成本批次
+                while not item['done']:
+                    self._cond.wait()
+                return item['ok']
+            self._leader_active = True
+        
+        # leader：持续处理直到没有待提交的写入
+        while True:
+            with self._cond:
+                if len(self._pending) < self.max_batch:
+                    self._cond.wait(self.window)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            
+            self._flush(batch)
+            
+            with self._cond:
+                for pending_item in batch:
+                    pending_item['done'] = True
+                self._cond.notify_all()
+                
+                if not self._pending:
+                    self._leader_active = False
+                    return item['ok']
+    
+    def commit_many(self, entries: List[Tuple[Path, Path, bytes]],
+                    durability: Durability = 'data') -> List[bool]:
+        """直接提交一组写入（调用方已自行成批），整批只同步一次目录"""
+        batch = [{'temp': temp_path, 'final': final_path, 'payload': payload,
+                  'durability': durability, 'sync_dir': durability != 'none',
+                  'done': False, 'ok': False}
+                 for temp_path, final_path, payload in entries]
+        self._flush(batch)
+        return [item['ok'] for item in batch]
+    
+    @staticmethod
+    def _flush(batch: List[Dict[str, Any]]):
+        """写入一批文件：逐个写入临时文件，统一重命名，每个目录只fsync一次"""
+        written = []
+        for item in batch:
+            try:
+                # 临时文件只有当前写入者可见，重命名本身是原子的，无需加锁
+                with open(item['temp'], 'wb') as f:
+                    f.write(item['payload'])
+                    f.flush()
+                    if item['durability'] == 'sync':
+                        os.fsync(f.fileno())
+                    elif item['durability'] == 'data':
+                        os.fdatasync(f.fileno())
+                written.append(item)
+            except Exception as e:
+                logger.error(f"写入队列文件失败 {item['final']}: {e}")
+        
+        directories = set()
+        for item in written:
+            try:
+                # 原子性重命名
+                item['temp'].rename(item['final'])
+                if item['sync_dir']:
+                    directories.add(item['final'].parent)
+                item['ok'] = True
+            except Exception as e:
+                logger.error(f"写入队列文件失败 {item['final']}: {e}")
+        
+        # 目录项落盘，保证重命名在崩溃后仍然可见
+        for directory in directories:
+            _fsync_directory(directory)
+
+
+# 同一队列目录的所有实例共享一个新任务事件，Web端入队可以直接唤醒Worker
+_task_events: Dict[str, threading.Event] = {}
+_task_events_lock = threading.Lock()
+
 
 class QueueManager:
-    """队列管理器 - 持久化任务队列的"调度员"""
+    """队列管理器 - 持久化任务队列的"调度员"
+    
+    队列文件按状态分目录存放，是任务数据的权威来源；queue_dir下的
+    SQLite索引记录每个任务的状态、入队时间和元数据，出队、计数和
+    列表查询都走索引，无需扫描目录并逐个stat文件。
+    """
+    
+    QUEUE_TYPES = ('pending', 'processing', 'completed', 'failed')
     
     def __init__(self, queue_dir: str = "data/queue"):
         self.queue_dir = Path(queue_dir)
-        self.lock = threading.RLock()
+        # 按目标队列划分的锁；跨队列移动依赖原子重命名和索引的条件更新
+        self._locks = {queue_type: threading.Lock() for queue_type in self.QUEUE_TYPES}
         
         # 队列子目录
         self.pending_dir = self.queue_dir / "pending"      # 待处理队列
@@ -31,10 +174,139 @@ class QueueManager:
                          self.completed_dir, self.failed_dir]:
             directory.mkdir(parents=True, exist_ok=True)
         
+        # 组提交：并发入队时合并落盘操作
+        self._group_commit = GroupCommit()
+        # 正在写入队列文件的任务
+        self._enqueuing = set()
+        
+        # 队列索引
+        self._db_lock = threading.Lock()
+        self._db = self._open_index()
+        self._sync_index()
+        
+        # 待处理队列为空的缓存：为True时空闲轮询只检查索引是否被其他连接修改过。
+        # 本连接上的入队不会改变data_version，由代数计数器避免查询与入队交错时丢失唤醒
+        self._pending_empty = False
+        self._pending_generation = 0
+        self._data_version: Optional[int] = None
+        
+        with _task_events_lock:
+            self._task_event = _task_events.setdefault(
+                str(self.queue_dir.resolve()), threading.Event()
+            )
+        
         logger.info("QueueManager初始化完成")
     
-    def _get_queue_file_path(self, mission_id: str, queue_type: str) -> Path:
-        """获取队列文件路径"""
+    def _open_index(self) -> sqlite3.Connection:
+        """打开队列索引数据库"""
+        db = sqlite3.connect(
+            str(self.queue_dir / "index.db"),
+            isolation_level=None,
+            check_same_thread=False
+        )
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS queue ("
+            "mission_id TEXT PRIMARY KEY, state TEXT NOT NULL, ts REAL NOT NULL, "
+            "metadata TEXT, error_info TEXT)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS ix_state_ts ON queue(state, ts)")
+        return db
+    
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """执行索引查询"""
+        with self._db_lock:
+            return self._db.execute(sql, params).fetchall()
+    
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        """执行索引更新，返回受影响的行数"""
+        with self._db_lock:
+            return self._db.execute(sql, params).rowcount
+    
+    def _index_changed(self) -> bool:
+        """索引自上次检查后是否被其他连接（其他实例或进程）修改过"""
+        version = self._query("PRAGMA data_version")[0][0]
+        changed = version != self._data_version
+        self._data_version = version
+        return changed
+    
+    def _pending_known_empty(self) -> bool:
+        """待处理队列是否确定为空（无需查询）"""
+        return self._pending_empty and not self._index_changed()
+    
+    def _mark_pending(self):
+        """待处理队列有新任务：清除空队列缓存并唤醒等待中的Worker（调用方持有pending锁）"""
+        self._pending_generation += 1
+        self._pending_empty = False
+        self._task_event.set()
+    
+    def _mark_pending_empty(self, generation: int):
+        """查询到待处理队列为空后设置缓存；查询期间有新任务入队（代数已变化）时不设置"""
+        with self._locks['pending']:
+            if self._pending_generation == generation:
+                self._pending_empty = True
+    
+    def notify_new_task(self):
+        """唤醒等待新任务的Worker（停止Worker时也用它打断等待）"""
+        self._task_event.set()
+    
+    def wait_for_task(self, timeout: float) -> bool:
+        """等待新任务入队，最多等待timeout秒，返回是否有待处理任务
+        
+        先清除事件再检查队列，检查之后入队的任务一定会唤醒本次等待；
+        其他进程的入队无法触发事件，由超时后的轮询兜底。
+        """
+        self._task_event.clear()
+        if self.has_pending_tasks():
+            return True
+        return self._task_event.wait(timeout)
+    
+    def _sync_index(self):
+        """以队列文件为准校正索引（启动时执行，兼容索引建立前的队列目录）"""
+        on_disk = {}
+        for queue_type in self.QUEUE_TYPES:
+            # scandir的目录项自带类型信息，stat结果也会被缓存
+            with os.scandir(self._get_queue_dir(queue_type)) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.queue') and entry.is_file():
+                        on_disk[entry.name[:-len('.queue')]] = (queue_type, entry)
+        
+        indexed = {row[0]: row[1] for row in self._query("SELECT mission_id, state FROM queue")}
+        
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for mission_id in indexed.keys() - on_disk.keys():
+                    self._db.execute("DELETE FROM queue WHERE mission_id = ?", (mission_id,))
+                
+                for mission_id, (queue_type, entry) in on_disk.items():
+                    if indexed.get(mission_id) == queue_type:
+                        continue
+                    
+                    data = self._read_queue_file(Path(entry.path)) or {}
+                    if queue_type == 'failed':
+                        error_info = self._read_error_file(mission_id)
+                        if error_info is not None:
+                            data['error_info'] = error_info
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO queue VALUES (?, ?, ?, ?, ?)",
+                        (
+                            mission_id,
+                            queue_type,
+                            entry.stat().st_mtime,
+                            _json_dumps(data.get('metadata') or {}).decode('utf-8'),
+                            _json_dumps(data['error_info']).decode('utf-8')
+                            if data.get('error_info') else None
+                        )
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+    
+    def _get_queue_dir(self, queue_type: str) -> Path:
+        """获取队列目录"""
         queue_dirs = {
             'pending': self.pending_dir,
             'processing': self.processing_dir,
@@ -45,44 +317,68 @@ class QueueManager:
         if queue_type not in queue_dirs:
             raise ValueError(f"无效的队列类型: {queue_type}")
         
-        return queue_dirs[queue_type] / f"{mission_id}.queue"
+        return queue_dirs[queue_type]
+    
+    def _get_queue_file_path(self, mission_id: str, queue_type: str) -> Path:
+        """获取队列文件路径"""
+        return self._get_queue_dir(queue_type) / f"{mission_id}.queue"
+    
+    def _get_error_file_path(self, mission_id: str) -> Path:
+        """获取失败信息文件路径（与失败队列文件并列存放）"""
+        return self.failed_dir / f"{mission_id}.err"
+    
+    def _read_error_file(self, mission_id: str) -> Optional[dict]:
+        """读取失败信息文件"""
+        error_file = self._get_error_file_path(mission_id)
+        if not error_file.exists():
+            return None
+        return self._read_queue_file(error_file)
+    
+    def _remove_error_file(self, mission_id: str):
+        """删除失败信息文件"""
+        error_file = self._get_error_file_path(mission_id)
+        if error_file.exists():
+            error_file.unlink()
+    
+    def _read_queue_file(self, file_path: Path) -> Optional[dict]:
+        """读取队列文件"""
+        try:
+            with open(file_path, 'rb') as f:
+                return _json_loads(f.read())
+        except Exception as e:
+            logger.warning(f"读取队列文件失败 {file_path}: {e}")
+            return None
+    
+    @staticmethod
+    def _build_queue_payload(mission_id: str, metadata: Optional[dict] = None) -> bytes:
+        """序列化队列文件内容"""
+        return _json_dumps({
+            'mission_id': mission_id,
+            'timestamp': datetime.now().isoformat(),
+            'metadata': metadata or {}
+        })
     
     def _write_queue_file(self, file_path: Path, mission_id: str, 
-                         metadata: Optional[dict] = None) -> bool:
-        """写入队列文件"""
+                         metadata: Optional[dict] = None,
+                         durability: Durability = 'data') -> bool:
+        """写入队列文件；durability决定落盘强度，只有需要持久化时才同步目录"""
         try:
-            import json
-            from datetime import datetime
-            
-            data = {
-                'mission_id': mission_id,
-                'timestamp': datetime.now().isoformat(),
-                'metadata': metadata or {}
-            }
-            
-            # 原子性写入
+            # 原子性写入，由组提交统一落盘
             temp_file = file_path.with_suffix('.tmp')
+            payload = self._build_queue_payload(mission_id, metadata)
             
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                # 获取排他锁
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                try:
-                    json.dump(data, f, ensure_ascii=False)
-                    f.flush()
-                    os.fsync(f.fileno())
-                finally:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-            
-            # 原子性重命名
-            temp_file.rename(file_path)
-            return True
-            
+            return self._group_commit.commit(
+                temp_file, file_path, payload,
+                durability=durability, sync_dir=durability != 'none'
+            )
+        
         except Exception as e:
             logger.error(f"写入队列文件失败 {file_path}: {e}")
             return False
     
-    def _move_queue_file(self, mission_id: str, from_queue: str, to_queue: str) -> bool:
-        """在队列间移动文件"""
+    def _move_queue_file(self, mission_id: str, from_queue: str, to_queue: str,
+                         durable: bool = False) -> bool:
+        """在队列间移动文件并同步索引状态；durable为True时同步目标目录"""
         try:
             from_path = self._get_queue_file_path(mission_id, from_queue)
             to_path = self._get_queue_file_path(mission_id, to_queue)
@@ -91,169 +387,274 @@ class QueueManager:
                 logger.warning(f"源队列文件不存在: {from_path}")
                 return False
             
-            # 原子性移动
-            from_path.rename(to_path)
+            with self._locks[to_queue]:
+                # 原子性移动（源文件已落盘，重命名本身无需再同步数据）
+                try:
+                    from_path.rename(to_path)
+                except FileNotFoundError:
+                    # 其他线程已抢先移动
+                    logger.warning(f"源队列文件不存在: {from_path}")
+                    return False
+                
+                if durable:
+                    _fsync_directory(to_path.parent)
+                self._execute(
+                    "UPDATE queue SET state = ? WHERE mission_id = ?", (to_queue, mission_id)
+                )
+                if to_queue == 'pending':
+                    self._mark_pending()
             return True
-            
+        
         except Exception as e:
             logger.error(f"移动队列文件失败 {mission_id} from {from_queue} to {to_queue}: {e}")
             return False
     
     def enqueue(self, mission_id: str, metadata: Optional[dict] = None) -> bool:
         """将任务加入待处理队列"""
-        with self.lock:
-            file_path = self._get_queue_file_path(mission_id, 'pending')
+        with self._locks['pending']:
+            rows = self._query("SELECT state FROM queue WHERE mission_id = ?", (mission_id,))
             
-            if file_path.exists():
+            if (rows and rows[0][0] == 'pending') or mission_id in self._enqueuing:
                 logger.warning(f"任务已在队列中: {mission_id}")
                 return False
             
-            success = self._write_queue_file(file_path, mission_id, metadata)
-            if success:
-                logger.info(f"任务入队: {mission_id}")
+            self._enqueuing.add(mission_id)
+        
+        try:
+            # 写文件时不持有锁，使并发入队能够合并到同一次组提交
+            file_path = self._get_queue_file_path(mission_id, 'pending')
+            if not self._write_queue_file(file_path, mission_id, metadata, durability='data'):
+                return False
             
-            return success
+            with self._locks['pending']:
+                # 重新入队的任务从原队列中移除，保证每个任务只处于一个状态
+                rows = self._query("SELECT state FROM queue WHERE mission_id = ?", (mission_id,))
+                if rows and rows[0][0] != 'pending':
+                    stale_file = self._get_queue_file_path(mission_id, rows[0][0])
+                    if stale_file.exists():
+                        stale_file.unlink()
+                    self._remove_error_file(mission_id)
+                
+                self._query(
+                    "INSERT OR REPLACE INTO queue VALUES (?, 'pending', ?, ?, NULL)",
+                    (mission_id, time.time(), _json_dumps(metadata or {}).decode('utf-8'))
+                )
+                self._mark_pending()
+            
+            logger.info(f"任务入队: {mission_id}")
+            return True
+        finally:
+            with self._locks['pending']:
+                self._enqueuing.discard(mission_id)
+    
+    def enqueue_batch(self, items: List[Tuple[str, Optional[dict]]],
+                      durability: Durability = 'data') -> List[bool]:
+        """批量入队：一次写入全部队列文件，整批只同步一次目录
+        
+        返回与items一一对应的结果，已在队列中（或批内重复）的任务为False。
+        """
+        results = [False] * len(items)
+        accepted = []
+        with self._locks['pending']:
+            for i, (mission_id, metadata) in enumerate(items):
+                rows = self._query("SELECT state FROM queue WHERE mission_id = ?", (mission_id,))
+                if (rows and rows[0][0] == 'pending') or mission_id in self._enqueuing:
+                    logger.warning(f"任务已在队列中: {mission_id}")
+                    continue
+                self._enqueuing.add(mission_id)
+                accepted.append((i, mission_id, metadata))
+        
+        if not accepted:
+            return results
+        
+        try:
+            entries = []
+            for _, mission_id, metadata in accepted:
+                file_path = self._get_queue_file_path(mission_id, 'pending')
+                entries.append((file_path.with_suffix('.tmp'), file_path,
+                                self._build_queue_payload(mission_id, metadata)))
+            written = self._group_commit.commit_many(entries, durability=durability)
+            
+            now = time.time()
+            rows_to_insert = []
+            with self._locks['pending']:
+                for (i, mission_id, metadata), ok in zip(accepted, written):
+                    if not ok:
+                        continue
+                    rows = self._query("SELECT state FROM queue WHERE mission_id = ?", (mission_id,))
+                    if rows and rows[0][0] != 'pending':
+                        stale_file = self._get_queue_file_path(mission_id, rows[0][0])
+                        if stale_file.exists():
+                            stale_file.unlink()
+                        self._remove_error_file(mission_id)
+                    # 批内按提交顺序递增时间戳，保证出队顺序与items一致
+                    rows_to_insert.append(
+                        (mission_id, now + len(rows_to_insert) * 1e-6, _json_dumps(metadata or {}).decode('utf-8'))
+                    )
+                    results[i] = True
+                
+                # 整批索引更新放在一个事务里
+                with self._db_lock:
+                    self._db.execute("BEGIN")
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO queue VALUES (?, 'pending', ?, ?, NULL)",
+                        rows_to_insert
+                    )
+                    self._db.execute("COMMIT")
+                if rows_to_insert:
+                    self._mark_pending()
+            
+            logger.info(f"批量入队: {len(rows_to_insert)}/{len(items)}")
+            return results
+        finally:
+            with self._locks['pending']:
+                for _, mission_id, _ in accepted:
+                    self._enqueuing.discard(mission_id)
     
     def dequeue(self) -> Optional[str]:
         """从待处理队列取出下一个任务"""
-        with self.lock:
-            # 获取最早的任务文件
-            queue_files = list(self.pending_dir.glob("*.queue"))
-            
-            if not queue_files:
+        if self._pending_known_empty():
+            return None
+        
+        while True:
+            # 取最早入队的任务
+            generation = self._pending_generation
+            rows = self._query(
+                "SELECT mission_id FROM queue WHERE state = 'pending' ORDER BY ts LIMIT 1"
+            )
+            if not rows:
+                self._mark_pending_empty(generation)
                 return None
             
-            # 按文件修改时间排序，取最早的
-            queue_files.sort(key=lambda f: f.stat().st_mtime)
-            earliest_file = queue_files[0]
+            mission_id = rows[0][0]
             
-            # 获取任务ID
-            mission_id = earliest_file.stem
+            # 通过条件更新认领任务，并发的消费者中只有一个能成功
+            if not self._execute(
+                "UPDATE queue SET state = 'processing' WHERE mission_id = ? AND state = 'pending'",
+                (mission_id,)
+            ):
+                continue
             
             # 移动到处理中队列
-            if self._move_queue_file(mission_id, 'pending', 'processing'):
-                logger.info(f"任务出队: {mission_id}")
-                return mission_id
+            try:
+                self._get_queue_file_path(mission_id, 'pending').rename(
+                    self._get_queue_file_path(mission_id, 'processing')
+                )
+            except FileNotFoundError:
+                # 队列文件已丢失，清理索引后继续取下一个
+                logger.warning(f"源队列文件不存在: {mission_id}")
+                self._execute(
+                    "DELETE FROM queue WHERE mission_id = ? AND state = 'processing'", (mission_id,)
+                )
+                continue
             
-            return None
+            logger.info(f"任务出队: {mission_id}")
+            return mission_id
     
     def mark_processing(self, mission_id: str) -> bool:
         """标记任务为处理中"""
-        with self.lock:
-            return self._move_queue_file(mission_id, 'pending', 'processing')
+        return self._move_queue_file(mission_id, 'pending', 'processing')
     
     def mark_completed(self, mission_id: str) -> bool:
         """标记任务为已完成"""
-        with self.lock:
-            success = self._move_queue_file(mission_id, 'processing', 'completed')
-            if success:
-                logger.info(f"任务完成: {mission_id}")
-            return success
+        # 完成状态是关键状态转换，需要持久化
+        success = self._move_queue_file(mission_id, 'processing', 'completed', durable=True)
+        if success:
+            logger.info(f"任务完成: {mission_id}")
+        return success
     
     def mark_failed(self, mission_id: str, error_info: Optional[dict] = None) -> bool:
         """标记任务为失败"""
-        with self.lock:
-            # 先移动文件
-            success = self._move_queue_file(mission_id, 'processing', 'failed')
-            
-            if success and error_info:
-                # 更新失败信息
-                file_path = self._get_queue_file_path(mission_id, 'failed')
-                try:
-                    import json
-                    with open(file_path, 'r+', encoding='utf-8') as f:
-                        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                        try:
-                            data = json.load(f)
-                            data['error_info'] = error_info
-                            f.seek(0)
-                            json.dump(data, f, ensure_ascii=False)
-                            f.truncate()
-                        finally:
-                            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                except Exception as e:
-                    logger.error(f"更新失败信息时出错 {mission_id}: {e}")
-            
-            if success:
-                logger.info(f"任务失败: {mission_id}")
-            
-            return success
+        # 先移动文件
+        success = self._move_queue_file(mission_id, 'processing', 'failed')
+        
+        if success and error_info:
+            # 失败信息写入独立的.err文件，队列文件创建后保持不变
+            try:
+                with open(self._get_error_file_path(mission_id), 'wb') as f:
+                    f.write(_json_dumps(error_info))
+                
+                self._execute(
+                    "UPDATE queue SET error_info = ? WHERE mission_id = ?",
+                    (_json_dumps(error_info).decode('utf-8'), mission_id)
+                )
+            except Exception as e:
+                logger.error(f"更新失败信息时出错 {mission_id}: {e}")
+        
+        if success:
+            logger.info(f"任务失败: {mission_id}")
+        
+        return success
     
     def retry_failed_task(self, mission_id: str) -> bool:
         """重试失败的任务"""
-        with self.lock:
-            return self._move_queue_file(mission_id, 'failed', 'pending')
+        if not self._move_queue_file(mission_id, 'failed', 'pending'):
+            return False
+        
+        self._remove_error_file(mission_id)
+        self._execute("UPDATE queue SET error_info = NULL WHERE mission_id = ?", (mission_id,))
+        return True
     
     def get_queue_size(self, queue_type: str) -> int:
         """获取指定队列的大小"""
-        queue_dirs = {
-            'pending': self.pending_dir,
-            'processing': self.processing_dir,
-            'completed': self.completed_dir,
-            'failed': self.failed_dir
-        }
-        
-        if queue_type not in queue_dirs:
+        if queue_type not in self.QUEUE_TYPES:
             return 0
         
-        return len(list(queue_dirs[queue_type].glob("*.queue")))
+        return self._query("SELECT COUNT(*) FROM queue WHERE state = ?", (queue_type,))[0][0]
     
     def get_queue_status(self) -> dict:
         """获取所有队列的状态"""
-        return {
-            'pending': self.get_queue_size('pending'),
-            'processing': self.get_queue_size('processing'),
-            'completed': self.get_queue_size('completed'),
-            'failed': self.get_queue_size('failed')
+        status = dict.fromkeys(self.QUEUE_TYPES, 0)
+        status.update(self._query("SELECT state, COUNT(*) FROM queue GROUP BY state"))
+        return status
+    
+    @staticmethod
+    def _row_to_task(row: tuple) -> dict:
+        """将索引记录转换为队列文件格式的任务信息"""
+        mission_id, ts, metadata, error_info = row
+        task: Dict[str, Any] = {
+            'mission_id': mission_id,
+            'timestamp': datetime.fromtimestamp(ts).isoformat(),
+            'metadata': _json_loads(metadata) if metadata else {}
         }
+        if error_info:
+            task['error_info'] = _json_loads(error_info)
+        return task
     
     def list_queue_tasks(self, queue_type: str, limit: Optional[int] = None) -> List[dict]:
         """列出指定队列中的任务"""
-        queue_dirs = {
-            'pending': self.pending_dir,
-            'processing': self.processing_dir,
-            'completed': self.completed_dir,
-            'failed': self.failed_dir
-        }
-        
-        if queue_type not in queue_dirs:
+        if queue_type not in self.QUEUE_TYPES:
             return []
         
-        tasks = []
-        queue_files = list(queue_dirs[queue_type].glob("*.queue"))
-        
-        # 按文件修改时间排序
-        queue_files.sort(key=lambda f: f.stat().st_mtime)
-        
-        if limit:
-            queue_files = queue_files[:limit]
-        
-        for queue_file in queue_files:
-            try:
-                import json
-                with open(queue_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    tasks.append(data)
-            except Exception as e:
-                logger.warning(f"读取队列文件失败 {queue_file}: {e}")
-        
-        return tasks
+        # 按入队时间排序，limit为空时不限制数量
+        rows = self._query(
+            "SELECT mission_id, ts, metadata, error_info FROM queue "
+            "WHERE state = ? ORDER BY ts LIMIT ?",
+            (queue_type, limit or -1)
+        )
+        return [self._row_to_task(row) for row in rows]
     
     def cleanup_completed_tasks(self, max_keep: int = 100) -> int:
         """清理已完成的任务（保留最近的max_keep个）"""
-        completed_files = list(self.completed_dir.glob("*.queue"))
+        # 按入队时间倒序，跳过最近的max_keep个
+        rows = self._query(
+            "SELECT mission_id FROM queue WHERE state = 'completed' "
+            "ORDER BY ts DESC LIMIT -1 OFFSET ?",
+            (max_keep,)
+        )
         
-        if len(completed_files) <= max_keep:
+        if not rows:
             return 0
         
-        # 按文件修改时间排序，删除最旧的
-        completed_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
-        files_to_delete = completed_files[max_keep:]
-        
         deleted_count = 0
-        for file_path in files_to_delete:
+        for (mission_id,) in rows:
+            file_path = self._get_queue_file_path(mission_id, 'completed')
             try:
-                file_path.unlink()
+                if file_path.exists():
+                    file_path.unlink()
+                self._query(
+                    "DELETE FROM queue WHERE mission_id = ? AND state = 'completed'", (mission_id,)
+                )
                 deleted_count += 1
             except Exception as e:
                 logger.error(f"删除队列文件失败 {file_path}: {e}")
@@ -263,18 +664,24 @@ class QueueManager:
     
     def get_processing_tasks(self) -> List[str]:
         """获取正在处理的任务ID列表"""
-        return [f.stem for f in self.processing_dir.glob("*.queue")]
+        rows = self._query("SELECT mission_id FROM queue WHERE state = 'processing'")
+        return [row[0] for row in rows]
     
     def get_pending_tasks(self) -> List[str]:
         """获取待处理的任务ID列表"""
-        files = list(self.pending_dir.glob("*.queue"))
-        # 按文件修改时间排序
-        files.sort(key=lambda f: f.stat().st_mtime)
-        return [f.stem for f in files]
+        rows = self._query("SELECT mission_id FROM queue WHERE state = 'pending' ORDER BY ts")
+        return [row[0] for row in rows]
     
     def has_pending_tasks(self) -> bool:
         """检查是否有待处理的任务"""
-        return self.get_queue_size('pending') > 0
+        if self._pending_known_empty():
+            return False
+        
+        generation = self._pending_generation
+        has_pending = bool(self._query("SELECT 1 FROM queue WHERE state = 'pending' LIMIT 1"))
+        if not has_pending:
+            self._mark_pending_empty(generation)
+        return has_pending
     
     def remove_from_queue(self, mission_id: str, queue_type: str) -> bool:
         """从指定队列中移除任务"""
@@ -282,6 +689,11 @@ class QueueManager:
             file_path = self._get_queue_file_path(mission_id, queue_type)
             if file_path.exists():
                 file_path.unlink()
+                if queue_type == 'failed':
+                    self._remove_error_file(mission_id)
+                self._query(
+                    "DELETE FROM queue WHERE mission_id = ? AND state = ?", (mission_id, queue_type)
+                )
                 logger.info(f"从{queue_type}队列移除任务: {mission_id}")
                 return True
             return False
@@ -292,30 +704,23 @@ class QueueManager:
     def recover_orphaned_tasks(self) -> int:
         """恢复孤儿任务（处理中但实际没有在处理的任务）"""
         recovered_count = 0
-        processing_files = list(self.processing_dir.glob("*.queue"))
         
-        for file_path in processing_files:
+        # 入队超过1小时仍处于处理状态的任务
+        rows = self._query(
+            "SELECT mission_id FROM queue WHERE state = 'processing' AND ts < ?",
+            (time.time() - 3600,)
+        )
+        
+        for (mission_id,) in rows:
             try:
-                import json
-                from datetime import datetime, timedelta
-                
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # 检查任务是否长时间处于处理状态
-                timestamp_str = data.get('timestamp')
-                if timestamp_str:
-                    timestamp = datetime.fromisoformat(timestamp_str)
-                    if datetime.now() - timestamp > timedelta(hours=1):  # 超过1小时
-                        mission_id = file_path.stem
-                        if self._move_queue_file(mission_id, 'processing', 'pending'):
-                            recovered_count += 1
-                            logger.info(f"恢复孤儿任务: {mission_id}")
-                
+                if self._move_queue_file(mission_id, 'processing', 'pending'):
+                    recovered_count += 1
+                    logger.info(f"恢复孤儿任务: {mission_id}")
+            
             except Exception as e:
-                logger.error(f"恢复孤儿任务时出错 {file_path}: {e}")
+                logger.error(f"恢复孤儿任务时出错 {mission_id}: {e}")
         
         if recovered_count > 0:
             logger.info(f"恢复了 {recovered_count} 个孤儿任务")
         
-        return recovered_count
\ No newline at end of file
+        return recovered_count
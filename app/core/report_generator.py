@@ -2,19 +2,94 @@
 报告生成器 - 将任务执行结果生成美观的HTML报告
 """
 
+import io
+import itertools
 import os
+import sys
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime
+from enum import Enum
 from typing import Dict, Any, Optional
 from jinja2 import Environment, FileSystemLoader, Template
+from markupsafe import Markup
 from .models import Mission, MissionStatus, SubtaskStatus
 
 logger = logging.getLogger(__name__)
 
+# 状态显示文本
+STATUS_TEXT_MAP = {
+    'completed': '已完成',
+    'failed': '失败',
+    'pending': '待处理',
+    'executing': '执行中',
+    'planning': '规划中',
+    'reporting': '报告中',
+    'rendering': '渲染中',
+    'notifying': '通知中'
+}
+
+if sys.version_info >= (3, 11):
+    # 3.11起fromisoformat原生支持'Z'后缀，无需替换字符串
+    _fromisoformat = datetime.fromisoformat
+else:
+    def _fromisoformat(value: str) -> datetime:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> datetime:
+    """解析ISO格式时间字符串（结果缓存，同一时间戳只解析一次）"""
+    return _fromisoformat(value)
+
+
+# 时长格式：依次对应只有秒、有分钟、有小时
+_DURATION_FORMATS = ("{2}秒", "{1}分钟{2}秒", "{0}小时{1}分钟{2}秒")
+
+
+# 预先生成的状态徽章HTML
+_BADGE_HTML = {
+    status: Markup(f'<span class="status-badge status-{status}">{text}</span>')
+    for status, text in STATUS_TEXT_MAP.items()
+}
+
+
+class LazyConfig:
+    """模板中按需读取配置，访问config.a.b时才调用config_manager.get('a.b')"""
+    
+    _MISSING = object()
+    
+    def __init__(self, config_manager, prefix: str = ''):
+        self._config_manager = config_manager
+        self._prefix = prefix
+    
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        
+        key = self._prefix + name
+        value = self._config_manager.get(key, self._MISSING)
+        if value is self._MISSING:
+            raise AttributeError(name)
+        if isinstance(value, dict):
+            return LazyConfig(self._config_manager, key + '.')
+        return value
+    
+    def __getitem__(self, name: str):
+        try:
+            return self.__getattr__(name)
+        except AttributeError:
+            raise KeyError(name)
+
 
 class ReportGenerator:
     """报告生成器 - 负责将任务结果渲染为HTML格式"""
     
+    # 报告文件序号，进程内所有实例共享，保证同一秒生成的报告不会重名
+    _report_seq = itertools.count()
+    
     def __init__(self, config_manager):
         self.config_manager = config_manager
         
@@ -33,6 +108,22 @@ class ReportGenerator:
         # 默认模板
         self._ensure_default_templates()
         
+        # 报告样式只在初始化时读取一次，渲染时作为变量整体注入
+        self._inline_css = self._load_inline_css()
+        
+        # 启动时间戳只格式化一次，与序号一起区分不同进程生成的报告
+        self._run_stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        # 每个线程复用一个渲染缓冲区，避免每次生成报告都重新分配
+        self._render_tls = threading.local()
+        
+        # 报告按任务ID末两位分目录存放，已创建的分片目录只需makedirs一次
+        self._report_dirs: set = set()
+        
+        # 预编译模板缓存
+        self._template_cache: Dict[str, Template] = {}
+        self._preload_templates()
+        
         logger.info("ReportGenerator初始化完成")
     
     def _init_jinja_environment(self):
@@ -40,7 +131,9 @@ class ReportGenerator:
         try:
             self.jinja_env = Environment(
                 loader=FileSystemLoader(self.templates_dir),
-                autoescape=True
+                autoescape=True,
+                cache_size=400,
+                auto_reload=False
             )
             
             # 添加自定义过滤器
@@ -48,10 +141,29 @@ class ReportGenerator:
             self.jinja_env.filters['status_badge'] = self._status_badge
             self.jinja_env.filters['duration_format'] = self._duration_format
             
+            # 自定义模板若引用config，按需读取而不是每次渲染都传入完整配置
+            self.jinja_env.globals['config'] = LazyConfig(self.config_manager)
+            
         except Exception as e:
             logger.error(f"初始化Jinja2环境失败: {e}")
             raise
     
+    def _preload_templates(self):
+        """预先编译所有可用模板"""
+        for template_name in self.get_available_templates():
+            try:
+                self._template_cache[template_name] = self.jinja_env.get_template(template_name)
+            except Exception as e:
+                logger.warning(f"预编译模板失败 {template_name}: {e}")
+    
+    def _get_template(self, template_name: str) -> Template:
+        """获取编译后的模板，未命中缓存时从加载器读取"""
+        template = self._template_cache.get(template_name)
+        if template is None:
+            template = self.jinja_env.get_template(template_name)
+            self._template_cache[template_name] = template
+        return template
+    
     def _ensure_default_templates(self):
         """确保默认模板存在"""
         default_template_path = os.path.join(self.templates_dir, 'mission_report.html')
@@ -59,6 +171,21 @@ class ReportGenerator:
         if not os.path.exists(default_template_path):
             logger.info("创建默认报告模板")
             self._create_default_template(default_template_path)
+        
+        default_stylesheet_path = os.path.join(self.templates_dir, 'style.css')
+        
+        if not os.path.exists(default_stylesheet_path):
+            logger.info("创建默认报告样式")
+            self._create_default_stylesheet(default_stylesheet_path)
+    
+    def _load_inline_css(self) -> str:
+        """读取报告样式表"""
+        try:
+            with open(os.path.join(self.templates_dir, 'style.css'), 'r', encoding='utf-8') as f:
+                return f.read()
+        except Exception as e:
+            logger.warning(f"读取报告样式失败: {e}")
+            return ''
     
     def _create_default_template(self, template_path: str):
         """创建默认报告模板"""
@@ -68,123 +195,7 @@ class ReportGenerator:
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>MyHelper 任务报告 - {{ mission.mission_id }}</title>
-    <style>
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            margin: 0;
-            padding: 20px;
-            background-color: #f5f5f5;
-            color: #333;
-        }
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }
-        .header {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 30px;
-            text-align: center;
-        }
-        .header h1 {
-            margin: 0;
-            font-size: 2.5em;
-            font-weight: 300;
-        }
-        .header .subtitle {
-            margin: 10px 0 0 0;
-            opacity: 0.9;
-            font-size: 1.1em;
-        }
-        .content {
-            padding: 30px;
-        }
-        .mission-info {
-            background: #f8f9fa;
-            border-radius: 6px;
-            padding: 20px;
-            margin-bottom: 30px;
-        }
-        .mission-info h2 {
-            margin-top: 0;
-            color: #495057;
-        }
-        .status-badge {
-            display: inline-block;
-            padding: 4px 12px;
-            border-radius: 20px;
-            font-size: 0.85em;
-            font-weight: 500;
-            text-transform: uppercase;
-        }
-        .status-completed { background: #d4edda; color: #155724; }
-        .status-failed { background: #f8d7da; color: #721c24; }
-        .status-pending { background: #fff3cd; color: #856404; }
-        .status-executing { background: #cce5ff; color: #004085; }
-        .subtasks {
-            margin-top: 30px;
-        }
-        .subtask {
-            border: 1px solid #e9ecef;
-            border-radius: 6px;
-            margin-bottom: 15px;
-            overflow: hidden;
-        }
-        .subtask-header {
-            background: #f8f9fa;
-            padding: 15px 20px;
-            border-bottom: 1px solid #e9ecef;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-        .subtask-content {
-            padding: 20px;
-        }
-        .meta-info {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            margin-top: 30px;
-            padding-top: 20px;
-            border-top: 2px solid #e9ecef;
-        }
-        .meta-item {
-            text-align: center;
-        }
-        .meta-item .label {
-            font-size: 0.9em;
-            color: #6c757d;
-            margin-bottom: 5px;
-        }
-        .meta-item .value {
-            font-size: 1.2em;
-            font-weight: 600;
-            color: #495057;
-        }
-        .summary {
-            background: #e7f3ff;
-            border-left: 4px solid #007bff;
-            padding: 20px;
-            margin: 30px 0;
-            border-radius: 0 6px 6px 0;
-        }
-        .summary h3 {
-            margin-top: 0;
-            color: #0056b3;
-        }
-        .footer {
-            text-align: center;
-            padding: 20px;
-            color: #6c757d;
-            font-size: 0.9em;
-            border-top: 1px solid #e9ecef;
-        }
-    </style>
+    <style>{{ inline_css | safe }}</style>
 </head>
 <body>
     <div class="container">
@@ -248,25 +259,19 @@ class ReportGenerator:
             <div class="meta-info">
                 <div class="meta-item">
                     <div class="label">子任务总数</div>
-                    <div class="value">{{ mission.subtask_graph | length }}</div>
+                    <div class="value">{{ stats.total }}</div>
                 </div>
                 <div class="meta-item">
                     <div class="label">已完成</div>
-                    <div class="value">{{ mission.subtask_graph | selectattr('status', 'equalto', 'completed') | list | length }}</div>
+                    <div class="value">{{ stats.completed }}</div>
                 </div>
                 <div class="meta-item">
                     <div class="label">失败</div>
-                    <div class="value">{{ mission.subtask_graph | selectattr('status', 'equalto', 'failed') | list | length }}</div>
+                    <div class="value">{{ stats.failed }}</div>
                 </div>
                 <div class="meta-item">
                     <div class="label">成功率</div>
-                    <div class="value">
-                        {% if mission.subtask_graph | length > 0 %}
-                        {{ "%.1f" | format((mission.subtask_graph | selectattr('status', 'equalto', 'completed') | list | length) / (mission.subtask_graph | length) * 100) }}%
-                        {% else %}
-                        0%
-                        {% endif %}
-                    </div>
+                    <div class="value">{{ "%.1f" | format(stats.success_rate) }}%</div>
                 </div>
             </div>
         </div>
@@ -288,6 +293,133 @@ class ReportGenerator:
             logger.error(f"创建默认模板失败: {e}")
             raise
     
+    def _create_default_stylesheet(self, stylesheet_path: str):
+        """创建默认报告样式表"""
+        default_css = """body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+    margin: 0;
+    padding: 20px;
+    background-color: #f5f5f5;
+    color: #333;
+}
+.container {
+    max-width: 1200px;
+    margin: 0 auto;
+    background: white;
+    border-radius: 8px;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+    overflow: hidden;
+}
+.header {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 30px;
+    text-align: center;
+}
+.header h1 {
+    margin: 0;
+    font-size: 2.5em;
+    font-weight: 300;
+}
+.header .subtitle {
+    margin: 10px 0 0 0;
+    opacity: 0.9;
+    font-size: 1.1em;
+}
+.content {
+    padding: 30px;
+}
+.mission-info {
+    background: #f8f9fa;
+    border-radius: 6px;
+    padding: 20px;
+    margin-bottom: 30px;
+}
+.mission-info h2 {
+    margin-top: 0;
+    color: #495057;
+}
+.status-badge {
+    display: inline-block;
+    padding: 4px 12px;
+    border-radius: 20px;
+    font-size: 0.85em;
+    font-weight: 500;
+    text-transform: uppercase;
+}
+.status-completed { background: #d4edda; color: #155724; }
+.status-failed { background: #f8d7da; color: #721c24; }
+.status-pending { background: #fff3cd; color: #856404; }
+.status-executing { background: #cce5ff; color: #004085; }
+.subtasks {
+    margin-top: 30px;
+}
+.subtask {
+    border: 1px solid #e9ecef;
+    border-radius: 6px;
+    margin-bottom: 15px;
+    overflow: hidden;
+}
+.subtask-header {
+    background: #f8f9fa;
+    padding: 15px 20px;
+    border-bottom: 1px solid #e9ecef;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+}
+.subtask-content {
+    padding: 20px;
+}
+.meta-info {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+    gap: 20px;
+    margin-top: 30px;
+    padding-top: 20px;
+    border-top: 2px solid #e9ecef;
+}
+.meta-item {
+    text-align: center;
+}
+.meta-item .label {
+    font-size: 0.9em;
+    color: #6c757d;
+    margin-bottom: 5px;
+}
+.meta-item .value {
+    font-size: 1.2em;
+    font-weight: 600;
+    color: #495057;
+}
+.summary {
+    background: #e7f3ff;
+    border-left: 4px solid #007bff;
+    padding: 20px;
+    margin: 30px 0;
+    border-radius: 0 6px 6px 0;
+}
+.summary h3 {
+    margin-top: 0;
+    color: #0056b3;
+}
+.footer {
+    text-align: center;
+    padding: 20px;
+    color: #6c757d;
+    font-size: 0.9em;
+    border-top: 1px solid #e9ecef;
+}
+"""
+        
+        try:
+            with open(stylesheet_path, 'w', encoding='utf-8') as f:
+                f.write(default_css)
+            logger.info(f"默认样式创建成功: {stylesheet_path}")
+        except Exception as e:
+            logger.error(f"创建默认样式失败: {e}")
+            raise
+    
     def generate_report(self, mission: Mission, template_name: str = 'mission_report.html') -> str:
         """生成任务报告"""
         try:
@@ -297,13 +429,10 @@ class ReportGenerator:
             template_data = self._prepare_template_data(mission)
             
             # 加载模板
-            template = self.jinja_env.get_template(template_name)
+            template = self._get_template(template_name)
             
-            # 渲染HTML
-            html_content = template.render(**template_data)
-            
-            # 保存报告文件
-            report_path = self._save_report(mission.mission_id, html_content)
+            # 流式渲染并保存报告文件
+            report_path = self._save_report(mission.mission_id, template, template_data)
             
             logger.info(f"报告生成完成: {report_path}")
             return report_path
@@ -314,21 +443,53 @@ class ReportGenerator:
     
     def _prepare_template_data(self, mission: Mission) -> Dict[str, Any]:
         """准备模板数据"""
+        # 模板直接访问任务对象的属性，无需先序列化为字典
         return {
-            'mission': mission.to_dict(),
+            'mission': mission,
+            'stats': self._subtask_stats(mission),
             'report_generated_at': datetime.now(),
-            'config': self.config_manager.get_all_config()
+            'inline_css': self._inline_css
+        }
+    
+    def _subtask_stats(self, mission: Mission) -> Dict[str, Any]:
+        """统计子任务完成情况，模板直接使用计算结果"""
+        total = len(mission.subtask_graph)
+        completed = sum(1 for s in mission.subtask_graph if s.status == SubtaskStatus.COMPLETED)
+        failed = sum(1 for s in mission.subtask_graph if s.status == SubtaskStatus.FAILED)
+        
+        return {
+            'total': total,
+            'completed': completed,
+            'failed': failed,
+            'success_rate': 100.0 * completed / total if total else 0.0
         }
     
-    def _save_report(self, mission_id: str, html_content: str) -> str:
-        """保存报告文件"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{mission_id}_{timestamp}.html"
-        report_path = os.path.join(self.output_dir, filename)
+    def _get_report_dir(self, mission_id: str) -> str:
+        """获取任务报告所在的分片目录（任务ID末两位，UUIDv7的前缀是时间戳不适合分片）"""
+        report_dir = os.path.join(self.output_dir, mission_id[-2:])
+        if report_dir not in self._report_dirs:
+            os.makedirs(report_dir, exist_ok=True)
+            self._report_dirs.add(report_dir)
+        return report_dir
+    
+    def _save_report(self, mission_id: str, template: Template,
+                     template_data: Dict[str, Any]) -> str:
+        """渲染到线程复用的缓冲区，再一次性写入报告文件"""
+        filename = f"{mission_id}_{self._run_stamp}_{next(self._report_seq):08d}.html"
+        report_path = os.path.join(self._get_report_dir(mission_id), filename)
+        
+        buf = getattr(self._render_tls, 'buf', None)
+        if buf is None:
+            buf = self._render_tls.buf = io.BytesIO()
         
         try:
-            with open(report_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            # 覆盖写入而不truncate，缓冲区容量在多次渲染之间保留
+            buf.seek(0)
+            template.stream(**template_data).dump(buf, encoding='utf-8')
+            size = buf.tell()
+            
+            with open(report_path, 'wb') as f, buf.getbuffer() as view, view[:size] as content:
+                f.write(content)
             return report_path
         except Exception as e:
             logger.error(f"保存报告失败: {e}")
@@ -343,7 +504,7 @@ class ReportGenerator:
         """格式化日期时间"""
         if isinstance(dt, str):
             try:
-                dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
+                dt = _parse_iso(dt)
             except:
                 return dt
         
@@ -353,22 +514,14 @@ class ReportGenerator:
     
     def _status_badge(self, status) -> str:
         """生成状态徽章HTML"""
+        if isinstance(status, Enum):
+            status = status.value
         status_str = str(status).lower()
-        badge_class = f"status-badge status-{status_str}"
-        
-        status_text_map = {
-            'completed': '已完成',
-            'failed': '失败', 
-            'pending': '待处理',
-            'executing': '执行中',
-            'planning': '规划中',
-            'reporting': '报告中',
-            'rendering': '渲染中',
-            'notifying': '通知中'
-        }
         
-        display_text = status_text_map.get(status_str, status_str)
-        return f'<span class="{badge_class}">{display_text}</span>'
+        badge = _BADGE_HTML.get(status_str)
+        if badge is None:
+            badge = Markup('<span class="status-badge status-{0}">{0}</span>').format(status_str)
+        return badge
     
     def _duration_format(self, time_tuple) -> str:
         """格式化时间差"""
@@ -376,24 +529,20 @@ class ReportGenerator:
             end_time, start_time = time_tuple
             
             if isinstance(end_time, str):
-                end_time = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
+                end_time = _parse_iso(end_time)
             if isinstance(start_time, str):
-                start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+                start_time = _parse_iso(start_time)
             
             if isinstance(end_time, datetime) and isinstance(start_time, datetime):
                 duration = end_time - start_time
                 total_seconds = int(duration.total_seconds())
                 
-                hours = total_seconds // 3600
-                minutes = (total_seconds % 3600) // 60
-                seconds = total_seconds % 60
+                hours, remainder = divmod(total_seconds, 3600)
+                minutes, seconds = divmod(remainder, 60)
                 
-                if hours > 0:
-                    return f"{hours}小时{minutes}分钟{seconds}秒"
-                elif minutes > 0:
-                    return f"{minutes}分钟{seconds}秒"
-                else:
-                    return f"{seconds}秒"
+                # 按最大的非零单位选择格式
+                index = (hours > 0) + (hours > 0 or minutes > 0)
+                return _DURATION_FORMATS[index].format(hours, minutes, seconds)
         except:
             pass
         
@@ -411,17 +560,46 @@ class ReportGenerator:
             logger.error(f"获取模板列表失败: {e}")
             return ['mission_report.html']
     
-    def cleanup_old_reports(self, days: int = 30):
-        """清理旧报告文件"""
+    # 待删除文件较多时，并发unlink的线程数上限（过多会在文件系统元数据上产生争用）
+    CLEANUP_UNLINK_WORKERS = 16
+    
+    def cleanup_old_reports(self, days: int = 30) -> int:
+        """清理旧报告文件，返回删除的文件数"""
         try:
             import time
             cutoff_time = time.time() - (days * 24 * 60 * 60)
             
-            for filename in os.listdir(self.output_dir):
-                if filename.endswith('.html'):
-                    filepath = os.path.join(self.output_dir, filename)
-                    if os.path.getmtime(filepath) < cutoff_time:
-                        os.remove(filepath)
-                        logger.info(f"清理旧报告: {filename}")
+            # 分片目录和分片前遗留在根目录的报告都要清理
+            expired = []
+            directories = [self.output_dir]
+            while directories:
+                # scandir一次遍历目录，目录项自带文件类型，无需逐个拼路径再stat
+                with os.scandir(directories.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.append(entry.path)
+                        elif entry.name.endswith('.html') and entry.is_file(follow_symlinks=False) \
+                                and entry.stat(follow_symlinks=False).st_mtime < cutoff_time:
+                            expired.append(entry.path)
+            
+            if len(expired) > self.CLEANUP_UNLINK_WORKERS:
+                with ThreadPoolExecutor(self.CLEANUP_UNLINK_WORKERS,
+                                        thread_name_prefix='report-cleanup') as pool:
+                    deleted = sum(pool.map(self._unlink_report, expired))
+            else:
+                deleted = sum(map(self._unlink_report, expired))
+            
+            logger.info(f"清理了 {deleted} 个旧报告")
+            return deleted
         except Exception as e:
-            logger.error(f"清理旧报告失败: {e}")
\ No newline at end of file
+            logger.error(f"清理旧报告失败: {e}")
+            return 0
+    
+    @staticmethod
+    def _unlink_report(path: str) -> bool:
+        """删除单个报告文件，文件已不存在或无法删除时返回False"""
+        try:
+            os.unlink(path)
+            return True
+        except OSError:
+            return False
\ No newline at end of file
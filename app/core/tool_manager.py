@@ -4,11 +4,21 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
+import random
+import threading
 from typing import Dict, Any, Optional, List
 import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,22 +27,81 @@ class MCPServiceError(Exception):
     pass
 
 
+class CircuitBreaker:
+    """熔断器 - 连续失败达到阈值后在冷却期内直接拒绝调用，冷却结束放行一次试探"""
+    
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """是否允许发起调用"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                # 半开：放行一次试探，失败则重新计时
+                self._opened_at = time.monotonic()
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+def _create_http_session() -> requests.Session:
+    """创建带连接池的HTTP会话；重试由call_with_retry负责，适配器层不重试"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(total=0, read=False)
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    
+    # 设置通用请求头
+    session.headers.update({
+        'User-Agent': 'MyHelper/0.1.0',
+        'Content-Type': 'application/json'
+    })
+    return session
+
+
+# 所有ToolManager实例共享的HTTP会话，对同一MCP服务复用TCP/TLS连接
+_SHARED_SESSION = _create_http_session()
+
+
 class ToolManager:
     """工具管理器 - 负责安全地调用外部MCP服务"""
     
     def __init__(self, config_manager):
         self.config_manager = config_manager
-        self.session = requests.Session()
+        self.session = _SHARED_SESSION
+        
+        # 按服务缓存预处理好的请求头：{服务名: (服务配置对象, 请求头)}
+        # 配置修改时会生成新的配置字典，对象不同即视为失效
+        self._headers_cache: Dict[str, tuple] = {}
+        
+        # 重试退避上限（秒）和按服务划分的熔断器
+        self.max_backoff = 10.0
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
         
         # 设置默认超时
         self.default_timeout = 30
         
-        # 设置通用请求头
-        self.session.headers.update({
-            'User-Agent': 'MyHelper/0.1.0',
-            'Content-Type': 'application/json'
-        })
-        
         logger.info("ToolManager初始化完成")
     
     def _get_service_config(self, service_name: str) -> Dict[str, Any]:
@@ -42,6 +111,17 @@ class ToolManager:
             raise MCPServiceError(f"未找到MCP服务配置: {service_name}")
         return config
     
+    def _get_request_headers(self, service_name: str,
+                             service_config: Dict[str, Any]) -> Dict[str, str]:
+        """获取服务的请求头，配置未变化时复用上次构建的结果"""
+        cached = self._headers_cache.get(service_name)
+        if cached is not None and cached[0] is service_config:
+            return cached[1]
+        
+        headers = self._prepare_request_headers(service_config)
+        self._headers_cache[service_name] = (service_config, headers)
+        return headers
+    
     def _prepare_request_headers(self, service_config: Dict[str, Any]) -> Dict[str, str]:
         """准备请求头"""
         headers = {}
@@ -70,6 +150,9 @@ class ToolManager:
             
             content_type = response.headers.get('content-type', '')
             if 'application/json' in content_type:
+                # orjson直接解析响应字节，省去一次整体解码为str
+                if orjson is not None:
+                    return orjson.loads(response.content)
                 return response.json()
             else:
                 return {
@@ -93,6 +176,12 @@ class ToolManager:
             error_msg = f"MCP服务请求错误 {service_name}: {e}"
             logger.error(error_msg)
             raise MCPServiceError(error_msg)
+        
+        except ValueError as e:
+            # orjson的解析错误不属于RequestException，与response.json()一样转为服务异常
+            error_msg = f"MCP服务响应解析错误 {service_name}: {e}"
+            logger.error(error_msg)
+            raise MCPServiceError(error_msg)
     
     def call_service(self, service_name: str, endpoint: str, 
                     method: str = 'POST', data: Optional[Dict] = None,
@@ -107,7 +196,7 @@ class ToolManager:
             full_url = urljoin(base_url, endpoint)
             
             # 准备请求头
-            headers = self._prepare_request_headers(service_config)
+            headers = self._get_request_headers(service_name, service_config)
             
             # 设置超时
             request_timeout = timeout or service_config.get('timeout', self.default_timeout)
@@ -136,28 +225,49 @@ class ToolManager:
             logger.error(f"MCP服务调用失败: {service_name} - {e}")
             raise
     
+    def _get_breaker(self, service_name: str) -> CircuitBreaker:
+        """获取服务对应的熔断器"""
+        breaker = self._breakers.get(service_name)
+        if breaker is None:
+            with self._breakers_lock:
+                breaker = self._breakers.setdefault(service_name, CircuitBreaker())
+        return breaker
+    
     def call_with_retry(self, service_name: str, endpoint: str,
                        method: str = 'POST', data: Optional[Dict] = None,
                        params: Optional[Dict] = None, timeout: Optional[int] = None,
                        max_retries: int = 3, retry_delay: float = 1.0) -> Dict[str, Any]:
         """带重试的MCP服务调用"""
         last_exception = None
+        breaker = self._get_breaker(service_name)
         
         for attempt in range(max_retries + 1):
+            # 熔断打开时不再发起请求，立即释放工作线程
+            if not breaker.allow():
+                raise last_exception or MCPServiceError(f"MCP服务熔断中: {service_name}")
+            
             try:
-                return self.call_service(service_name, endpoint, method, data, params, timeout)
+                result = self.call_service(service_name, endpoint, method, data, params, timeout)
+                breaker.record_success()
+                return result
                 
             except MCPServiceError as e:
                 last_exception = e
+                breaker.record_failure()
                 
                 if attempt < max_retries:
-                    # 计算退避延迟（指数退避）
-                    delay = retry_delay * (2 ** attempt)
-                    logger.warning(f"MCP服务调用失败，{delay}s后重试 (第{attempt + 1}次): {e}")
+                    # 计算退避延迟（有上限的指数退避，加随机抖动避免各线程同时重试）
+                    delay = min(self.max_backoff, retry_delay * (2 ** attempt)) * (0.5 + random.random())
+                    logger.warning(f"MCP服务调用失败，{delay:.2f}s后重试 (第{attempt + 1}次): {e}")
                     time.sleep(delay)
                 else:
                     logger.error(f"MCP服务调用重试次数用尽: {service_name}")
                     break
+            
+            except requests.exceptions.RequestException:
+                # 连接类错误不重试，但计入熔断统计
+                breaker.record_failure()
+                raise
         
         # 重试失败，抛出最后的异常
         raise last_exception
@@ -201,12 +311,16 @@ class ToolManager:
     def check_all_services_health(self) -> Dict[str, Dict[str, Any]]:
         """检查所有MCP服务的健康状态"""
         services = self.get_available_services()
-        health_status = {}
-        
-        for service_name in services:
-            health_status[service_name] = self.check_service_health(service_name)
+        if not services:
+            return {}
         
-        return health_status
+        # 各服务的健康检查互不依赖，并发执行，总耗时取决于最慢的服务
+        with ThreadPoolExecutor(max_workers=min(32, len(services))) as executor:
+            futures = {
+                service_name: executor.submit(self.check_service_health, service_name)
+                for service_name in services
+            }
+            return {service_name: future.result() for service_name, future in futures.items()}
     
     # 常用的MCP服务调用方法
     
@@ -5,6 +5,7 @@
 import threading
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Optional, Dict, Any
 from datetime import datetime
 
@@ -21,6 +22,30 @@ from ..agents.agent_factory import AgentFactory
 logger = logging.getLogger(__name__)
 
 
+class TokenBucket:
+    """令牌桶限速器：平均每秒发放rate个令牌，最多积攒burst个"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """取走一个令牌，令牌不足时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
 class Worker:
     """后台工作线程 - 驱动任务从PENDING到COMPLETED的整个生命周期"""
     
@@ -37,12 +62,40 @@ class Worker:
         # 工作线程控制
         self.running = False
         self.worker_thread = None
+        # 运行时长以单调时钟计算，不受系统时间调整影响
+        self._start_monotonic = time.monotonic()
         
         # 配置参数
         self.check_interval = config_manager.get('system.queue_check_interval', 5)
         self.max_retries = config_manager.get('system.max_retries', 3)
         self.task_timeout = config_manager.get('system.task_timeout', 3600)
         
+        # 子任务并行执行的线程池；子任务状态的修改和任务持久化由锁串行化
+        self._subtask_pool = ThreadPoolExecutor(
+            max_workers=config_manager.get('system.subtask_parallelism', 8),
+            thread_name_prefix='subtask'
+        )
+        self._mission_lock = threading.Lock()
+        
+        # Agent调用（LLM/外部服务请求）的并发上限和速率限制，避免超出服务方的限额
+        self.llm_max_concurrency = config_manager.get('system.llm_max_concurrency', 8)
+        self._llm_semaphore = threading.Semaphore(self.llm_max_concurrency)
+        llm_rate_limit = config_manager.get('system.llm_rate_limit', 0)
+        self._llm_bucket = TokenBucket(
+            llm_rate_limit, config_manager.get('system.llm_rate_burst', self.llm_max_concurrency)
+        ) if llm_rate_limit > 0 else None
+        self._llm_stats_lock = threading.Lock()
+        self._llm_inflight = 0
+        self._llm_queued = 0
+        
+        # LLM连通性由后台线程定期探测，健康检查只读取最近一次结果
+        self.llm_probe_interval = config_manager.get('system.llm_probe_interval', 15)
+        self._llm_health: Optional[Dict[str, Any]] = None
+        self._llm_probe_lock = threading.Lock()
+        self._llm_probe_thread = None
+        # 每个探测线程对应一个停止事件，stop()置位后线程在下一次等待时退出
+        self._llm_probe_stop: Optional[threading.Event] = None
+        
         logger.info("Worker初始化完成")
     
     def start(self):
@@ -62,10 +115,17 @@ class Worker:
             return
         
         self.running = False
+        self._stop_llm_probe()
+        # 打断空闲等待，使join立即返回
+        self.notify_new_task()
         if self.worker_thread:
             self.worker_thread.join(timeout=10)
         logger.info("Worker线程停止")
     
+    def notify_new_task(self):
+        """有新任务入队时唤醒工作线程（同目录QueueManager的入队会自动唤醒）"""
+        self.queue_manager.notify_new_task()
+    
     def run(self):
         """运行Worker（阻塞方式）"""
         self.running = True
@@ -80,39 +140,34 @@ class Worker:
         
         while self.running:
             try:
-                # 检查是否有待处理的任务
-                if not self.queue_manager.has_pending_tasks():
-                    time.sleep(self.check_interval)
-                    continue
-                
-                # 获取下一个任务
+                # 直接认领下一个任务；队列为空时等待入队唤醒，超时后再轮询兜底
                 mission_id = self.queue_manager.dequeue()
                 if not mission_id:
-                    time.sleep(self.check_interval)
+                    self.queue_manager.wait_for_task(self.check_interval)
                     continue
                 
                 # 处理任务
                 self._process_mission(mission_id)
                 
             except Exception as e:
-                logger.error(f"Worker循环出错: {e}")
+                logger.error("Worker循环出错: %s", e)
                 time.sleep(self.check_interval)
     
     def _process_mission(self, mission_id: str):
         """处理单个任务"""
         try:
-            logger.info(f"开始处理任务: {mission_id}")
+            logger.info("开始处理任务: %s", mission_id)
             
             # 加载任务
-            mission = self.mission_manager.get_mission(mission_id)
+            mission = self.mission_manager.get_mission(mission_id, shared=True)
             if not mission:
-                logger.error(f"任务不存在: {mission_id}")
+                logger.error("任务不存在: %s", mission_id)
                 self.queue_manager.mark_failed(mission_id, {"error": "任务不存在"})
                 return
             
             # 检查任务状态
             if mission.status != MissionStatus.PENDING:
-                logger.warning(f"任务状态异常: {mission_id} - {mission.status}")
+                logger.warning("任务状态异常: %s - %s", mission_id, mission.status)
                 return
             
             # 执行任务
@@ -128,6 +183,9 @@ class Worker:
             error_message = f"处理任务异常 {mission_id}: {e}"
             logger.error(error_message)
             self.queue_manager.mark_failed(mission_id, {"error": error_message})
+        finally:
+            # 任务已结束，释放缓存的任务对象
+            self.mission_manager.evict(mission_id)
     
     def _execute_mission(self, mission: Mission) -> bool:
         """执行任务的主要逻辑"""
@@ -156,7 +214,7 @@ class Worker:
             mission.update_status(MissionStatus.COMPLETED)
             self.mission_manager.update_mission(mission)
             
-            logger.info(f"任务执行完成: {mission.mission_id}")
+            logger.info("任务执行完成: %s", mission.mission_id)
             return True
             
         except Exception as e:
@@ -169,7 +227,7 @@ class Worker:
     def _planning_phase(self, mission: Mission) -> bool:
         """规划阶段"""
         try:
-            logger.info(f"进入规划阶段: {mission.mission_id}")
+            logger.info("进入规划阶段: %s", mission.mission_id)
             mission.update_status(MissionStatus.PLANNING)
             self.mission_manager.update_mission(mission)
             
@@ -187,7 +245,7 @@ class Worker:
             analysis_data = result['data']
             subtasks = analysis_data.get('subtasks', [])
             
-            mission.subtask_graph = []
+            mission.clear_subtasks()
             for subtask_data in subtasks:
                 mission.add_subtask(
                     subagent_name=subtask_data['subagent_name'],
@@ -196,7 +254,7 @@ class Worker:
                 )
             
             self.mission_manager.update_mission(mission)
-            logger.info(f"规划完成，生成{len(mission.subtask_graph)}个子任务")
+            logger.info("规划完成，生成%s个子任务", len(mission.subtask_graph))
             
             return True
             
@@ -210,42 +268,58 @@ class Worker:
     def _execution_phase(self, mission: Mission) -> bool:
         """执行阶段"""
         try:
-            logger.info(f"进入执行阶段: {mission.mission_id}")
+            logger.info("进入执行阶段: %s", mission.mission_id)
             mission.update_status(MissionStatus.EXECUTING)
             self.mission_manager.update_mission(mission)
             
-            # 循环执行子任务直到完成或失败
-            max_iterations = len(mission.subtask_graph) * 2  # 防止无限循环
-            iteration = 0
-            
-            while not mission.is_all_subtasks_completed() and iteration < max_iterations:
-                iteration += 1
+            # 依赖满足的子任务立即提交到线程池，任一子任务完成后再调度新就绪的子任务
+            submitted = set()
+            running = {}
+            deadline = time.monotonic() + self.task_timeout
+            # 超时后置位：仍在运行的子任务结束时不再修改任务，其结果直接丢弃
+            cancelled = threading.Event()
+            
+            while True:
+                with self._mission_lock:
+                    ready_subtasks = [task for task in mission.get_ready_subtasks()
+                                      if task.subtask_id not in submitted]
                 
-                # 获取可执行的子任务
-                ready_subtasks = mission.get_ready_subtasks()
+                for subtask in ready_subtasks:
+                    submitted.add(subtask.subtask_id)
+                    running[self._subtask_pool.submit(self._execute_subtask, mission, subtask, cancelled)] = subtask
                 
-                if not ready_subtasks:
-                    # 检查是否有失败的子任务
-                    if mission.has_failed_subtasks():
-                        raise Exception("存在失败的子任务")
-                    
-                    # 没有可执行的任务，可能存在循环依赖
-                    if mission.get_pending_subtasks():
-                        raise Exception("检测到循环依赖或无法满足的依赖")
-                    
+                if not running:
                     break
                 
-                # 执行就绪的子任务
-                for subtask in ready_subtasks:
-                    self._execute_subtask(mission, subtask)
-                    self.mission_manager.update_mission(mission)
+                done, _ = wait(running, timeout=max(deadline - time.monotonic(), 0),
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    # 已提交但尚未开始的子任务直接取消；正在运行的子任务无法中断，
+                    # 置位后它们不会再写入任务（写入都在_mission_lock内检查该标记）
+                    with self._mission_lock:
+                        cancelled.set()
+                    for future in running:
+                        future.cancel()
+                    raise Exception(f"子任务执行超时（{self.task_timeout}秒）")
+                
+                for future in done:
+                    del running[future]
                 
-                time.sleep(1)  # 短暂延迟
+                with self._mission_lock:
+                    self.mission_manager.update_mission(mission)
             
             if not mission.is_all_subtasks_completed():
+                # 检查是否有失败的子任务
+                if mission.has_failed_subtasks():
+                    raise Exception("存在失败的子任务")
+                
+                # 没有可执行的任务，可能存在循环依赖
+                if mission.get_pending_subtasks():
+                    raise Exception("检测到循环依赖或无法满足的依赖")
+                
                 raise Exception("子任务执行未完成")
             
-            logger.info(f"执行阶段完成: {mission.mission_id}")
+            logger.info("执行阶段完成: %s", mission.mission_id)
             return True
             
         except Exception as e:
@@ -255,58 +329,96 @@ class Worker:
             self.mission_manager.update_mission(mission)
             return False
     
-    def _execute_subtask(self, mission: Mission, subtask):
-        """执行单个子任务"""
+    def _call_agent(self, agent, goal: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """在并发上限和速率限制下执行Agent"""
+        with self._llm_stats_lock:
+            self._llm_queued += 1
+        acquired = False
         try:
-            logger.info(f"执行子任务: {subtask.subtask_id} - {subtask.goal}")
-            
-            # 更新子任务状态
-            mission.update_subtask_status(subtask.subtask_id, SubtaskStatus.IN_PROGRESS)
+            self._llm_semaphore.acquire()
+            acquired = True
+            if self._llm_bucket is not None:
+                self._llm_bucket.acquire()
+        finally:
+            with self._llm_stats_lock:
+                self._llm_queued -= 1
+                if acquired:
+                    self._llm_inflight += 1
+        
+        try:
+            return agent.execute(goal, context)
+        finally:
+            with self._llm_stats_lock:
+                self._llm_inflight -= 1
+            self._llm_semaphore.release()
+    
+    def _execute_subtask(self, mission: Mission, subtask, cancelled: Optional[threading.Event] = None):
+        """执行单个子任务；cancelled被置位后（执行阶段已超时）不再修改任务"""
+        cancelled = cancelled or threading.Event()
+        try:
+            logger.info("执行子任务: %s - %s", subtask.subtask_id, subtask.goal)
             
             # 获取对应的Agent
             agent = self.agent_factory.get_agent(subtask.subagent_name)
             if not agent:
                 raise Exception(f"无法创建Agent: {subtask.subagent_name}")
             
-            # 准备上下文
-            context = {
-                'mission_id': mission.mission_id,
-                'mission_data': mission.to_dict(),
-                'subtask_id': subtask.subtask_id
-            }
-            
-            # 执行Agent
-            result = agent.execute(subtask.goal, context)
+            # 更新子任务状态并准备上下文（可能与其他子任务线程并发，需持锁）
+            with self._mission_lock:
+                if cancelled.is_set():
+                    return
+                mission.update_subtask_status(subtask.subtask_id, SubtaskStatus.IN_PROGRESS)
+                context = {
+                    'mission_id': mission.mission_id,
+                    'mission_data': mission.to_dict(),
+                    'subtask_id': subtask.subtask_id
+                }
+            
+            # 执行Agent（不持锁，子任务的LLM/服务调用可以并行，但受并发上限和限速约束）
+            result = self._call_agent(agent, subtask.goal, context)
+            
+            if cancelled.is_set():
+                logger.warning("执行阶段已超时，丢弃子任务结果: %s", subtask.subtask_id)
+                return
             
             if result['status'] == 'success':
-                mission.update_subtask_status(
-                    subtask.subtask_id, 
-                    SubtaskStatus.COMPLETED,
-                    result=result.get('data')
-                )
-                logger.info(f"子任务完成: {subtask.subtask_id}")
+                with self._mission_lock:
+                    if cancelled.is_set():
+                        return
+                    mission.update_subtask_status(
+                        subtask.subtask_id, 
+                        SubtaskStatus.COMPLETED,
+                        result=result.get('data')
+                    )
+                logger.info("子任务完成: %s", subtask.subtask_id)
             else:
                 error_message = result.get('error', '未知错误')
+                with self._mission_lock:
+                    if cancelled.is_set():
+                        return
+                    mission.update_subtask_status(
+                        subtask.subtask_id,
+                        SubtaskStatus.FAILED,
+                        error_message=error_message
+                    )
+                logger.error("子任务失败: %s - %s", subtask.subtask_id, error_message)
+                
+        except Exception as e:
+            error_message = f"子任务执行异常: {e}"
+            logger.error(error_message)
+            with self._mission_lock:
+                if cancelled.is_set():
+                    return
                 mission.update_subtask_status(
                     subtask.subtask_id,
                     SubtaskStatus.FAILED,
                     error_message=error_message
                 )
-                logger.error(f"子任务失败: {subtask.subtask_id} - {error_message}")
-                
-        except Exception as e:
-            error_message = f"子任务执行异常: {e}"
-            logger.error(error_message)
-            mission.update_subtask_status(
-                subtask.subtask_id,
-                SubtaskStatus.FAILED,
-                error_message=error_message
-            )
     
     def _reporting_phase(self, mission: Mission) -> bool:
         """报告总结阶段"""
         try:
-            logger.info(f"进入报告阶段: {mission.mission_id}")
+            logger.info("进入报告阶段: %s", mission.mission_id)
             mission.update_status(MissionStatus.REPORTING)
             self.mission_manager.update_mission(mission)
             
@@ -321,16 +433,16 @@ class Worker:
             if result['status'] == 'success':
                 mission.final_summary = result['data'].get('summary', '')
                 self.mission_manager.update_mission(mission)
-                logger.info(f"报告阶段完成: {mission.mission_id}")
+                logger.info("报告阶段完成: %s", mission.mission_id)
             else:
-                logger.warning(f"报告生成失败，使用默认总结: {result.get('error')}")
+                logger.warning("报告生成失败，使用默认总结: %s", result.get('error'))
                 mission.final_summary = f"任务完成: {mission.natural_language_goal}"
                 self.mission_manager.update_mission(mission)
             
             return True
             
         except Exception as e:
-            logger.error(f"报告阶段失败: {e}")
+            logger.error("报告阶段失败: %s", e)
             mission.final_summary = f"任务完成: {mission.natural_language_goal}"
             self.mission_manager.update_mission(mission)
             return True  # 报告失败不影响任务完成
@@ -340,10 +452,10 @@ class Worker:
         try:
             # 检查是否需要生成报告
             if not mission.report_config:
-                logger.info(f"跳过渲染阶段（无需生成报告）: {mission.mission_id}")
+                logger.info("跳过渲染阶段（无需生成报告）: %s", mission.mission_id)
                 return True
             
-            logger.info(f"进入渲染阶段: {mission.mission_id}")
+            logger.info("进入渲染阶段: %s", mission.mission_id)
             mission.update_status(MissionStatus.RENDERING)
             self.mission_manager.update_mission(mission)
             
@@ -357,23 +469,22 @@ class Worker:
                 mission.result_page_url = report_url
                 
                 # 保存报告路径到任务数据
-                if not hasattr(mission, 'report_path'):
-                    mission.report_path = report_path
+                mission.report_path = report_path
                 
                 self.mission_manager.update_mission(mission)
-                logger.info(f"报告生成成功: {report_path}")
+                logger.info("报告生成成功: %s", report_path)
                 
             except Exception as e:
-                logger.error(f"报告生成失败: {e}")
+                logger.error("报告生成失败: %s", e)
                 # 设置默认URL，不影响任务完成
                 mission.result_page_url = f"/results/{mission.mission_id}.html"
                 self.mission_manager.update_mission(mission)
             
-            logger.info(f"渲染阶段完成: {mission.mission_id}")
+            logger.info("渲染阶段完成: %s", mission.mission_id)
             return True
             
         except Exception as e:
-            logger.error(f"渲染阶段失败: {e}")
+            logger.error("渲染阶段失败: %s", e)
             return True  # 渲染失败不影响任务完成
     
     def _notification_phase(self, mission: Mission) -> bool:
@@ -381,41 +492,104 @@ class Worker:
         try:
             # 检查是否需要发送通知
             if not mission.notification_configs:
-                logger.info(f"跳过通知阶段（无需发送通知）: {mission.mission_id}")
+                logger.info("跳过通知阶段（无需发送通知）: %s", mission.mission_id)
                 return True
             
-            logger.info(f"进入通知阶段: {mission.mission_id}")
+            logger.info("进入通知阶段: %s", mission.mission_id)
             mission.update_status(MissionStatus.NOTIFYING)
             self.mission_manager.update_mission(mission)
             
-            # 使用NotificationManager发送通知
-            try:
-                results = self.notification_manager.send_mission_notification(
-                    mission_data=mission.to_dict(),
-                    notification_configs=mission.notification_configs
-                )
-                
-                # 记录通知结果
-                success_count = sum(1 for success in results.values() if success)
-                total_count = len(results)
-                
-                logger.info(f"通知发送完成: {success_count}/{total_count} 成功")
-                
-                # 即使部分通知失败，也不影响任务完成
-                if success_count == 0 and total_count > 0:
-                    logger.warning(f"所有通知发送失败: {mission.mission_id}")
-                
-            except Exception as e:
-                logger.error(f"通知发送异常: {e}")
-                # 通知失败不影响任务完成
+            # 通知在后台发送，Worker不等待SMTP/HTTP请求完成；通知失败不影响任务完成
+            mission_data = mission.to_dict()
+            future = self.notification_manager.send_mission_notification_async(
+                mission_data=mission_data,
+                notification_configs=mission_data['notification_configs']
+            )
+            future.add_done_callback(
+                lambda f, mission_id=mission.mission_id: self._log_notification_results(mission_id, f)
+            )
             
-            logger.info(f"通知阶段完成: {mission.mission_id}")
+            logger.info("通知阶段完成（后台发送中）: %s", mission.mission_id)
             return True
             
         except Exception as e:
-            logger.error(f"通知阶段失败: {e}")
+            logger.error("通知阶段失败: %s", e)
             return True  # 通知失败不影响任务完成
     
+    @staticmethod
+    def _log_notification_results(mission_id: str, future):
+        """记录后台通知的发送结果"""
+        try:
+            results = future.result()
+        except Exception as e:
+            logger.error("通知发送异常: %s", e)
+            return
+        
+        success_count = sum(1 for success in results.values() if success)
+        total_count = len(results)
+        logger.info("通知发送完成: %s %s/%s 成功", mission_id, success_count, total_count)
+        
+        # 即使部分通知失败，也不影响任务完成
+        if success_count == 0 and total_count > 0:
+            logger.warning("所有通知发送失败: %s", mission_id)
+    
+    def _probe_llm(self) -> Dict[str, Any]:
+        """执行一次LLM连通性测试并记录结果"""
+        result = {
+            'connected': self.llm_manager.test_connection(),
+            'checked_at': datetime.now().isoformat()
+        }
+        self._llm_health = result
+        return result
+    
+    def _llm_probe_loop(self, stop_event: threading.Event):
+        """后台探测循环，stop_event置位后退出"""
+        while not stop_event.wait(self.llm_probe_interval):
+            try:
+                self._probe_llm()
+            except Exception as e:
+                logger.error("LLM连通性探测失败: %s", e)
+    
+    def _stop_llm_probe(self):
+        """停止后台探测线程（不等待正在进行的探测结束）"""
+        with self._llm_probe_lock:
+            if self._llm_probe_stop is not None:
+                self._llm_probe_stop.set()
+            self._llm_probe_stop = None
+            self._llm_probe_thread = None
+    
+    def get_llm_health(self, force: bool = False) -> Dict[str, Any]:
+        """获取最近一次的LLM连通性结果，Worker运行时首次调用会启动后台探测线程
+        
+        force为True或尚无结果时在当前线程立即探测一次。
+        """
+        with self._llm_probe_lock:
+            if self.running and self._llm_probe_thread is None:
+                self._llm_probe_stop = threading.Event()
+                self._llm_probe_thread = threading.Thread(
+                    target=self._llm_probe_loop, args=(self._llm_probe_stop,),
+                    daemon=True, name='llm-probe'
+                )
+                self._llm_probe_thread.start()
+        
+        result = self._llm_health
+        if force or result is None:
+            result = self._probe_llm()
+        return result
+    
+    def uptime_seconds(self) -> float:
+        """Worker创建以来经过的秒数"""
+        return time.monotonic() - self._start_monotonic
+    
+    def collect_metrics_snapshot(self) -> Dict[str, Any]:
+        """一次性收集指标接口所需的运行数据，队列状态只查询一次"""
+        return {
+            'running': self.running,
+            'queue_status': self.queue_manager.get_queue_status(),
+            'llm_stats': self.llm_manager.get_usage_stats(),
+            'notifications': self.notification_manager.get_recent_stats()
+        }
+    
     def get_worker_status(self) -> Dict[str, Any]:
         """获取Worker状态"""
         queue_status = self.queue_manager.get_queue_status()
@@ -425,6 +599,11 @@ class Worker:
             'thread_alive': self.worker_thread and self.worker_thread.is_alive(),
             'check_interval': self.check_interval,
             'queue_status': queue_status,
+            'agent_calls': {
+                'inflight': self._llm_inflight,
+                'queued': self._llm_queued,
+                'max_concurrency': self.llm_max_concurrency
+            },
             'configuration': {
                 'max_retries': self.max_retries,
                 'task_timeout': self.task_timeout
@@ -6,146 +6,87 @@
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
 
-
-class FileSystemSetup:
-    """文件系统设置管理器"""
-    
-    def __init__(self, base_dir: str = None):
-        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
-        
-    def setup_directory_structure(self):
-        """设置完整的目录结构"""
-        directories = [
-            # 数据目录
-            'data',
-            'data/missions',
-            'data/queue',
-            'data/queue/pending',
-            'data/queue/processing', 
-            'data/queue/completed',
-            'data/queue/failed',
-            'data/logs',
-            'data/config',
-            'data/reports',
-            'data/backups',
-            
-            # 模板目录
-            'templates',
-            'templates/reports',
-            
-            # 静态文件目录
-            'static',
-            'static/css',
-            'static/js',
-            'static/images',
-            
-            # 配置目录
-            'config',
-            
-            # 临时目录
-            'tmp'
-        ]
-        
-        created_dirs = []
-        for directory in directories:
-            dir_path = self.base_dir / directory
-            if not dir_path.exists():
-                dir_path.mkdir(parents=True, exist_ok=True)
-                created_dirs.append(str(dir_path))
-                logger.info(f"创建目录: {dir_path}")
-        
-        if created_dirs:
-            logger.info(f"共创建 {len(created_dirs)} 个目录")
-        else:
-            logger.info("所有目录已存在")
-            
-        return created_dirs
-    
-    def setup_default_config(self):
-        """设置默认配置文件"""
-        config_file = self.base_dir / 'config' / 'default.json'
-        
-        if config_file.exists():
-            logger.info("配置文件已存在，跳过创建")
-            return
-        
-        default_config = {
-            "system": {
-                "name": "MyHelper",
-                "version": "1.0.0",
-                "queue_check_interval": 5,
-                "max_retries": 3,
-                "task_timeout": 3600,
-                "backup_enabled": True,
-                "backup_interval": 86400
-            },
-            "web": {
-                "host": "0.0.0.0",
-                "port": 5000,
-                "debug": False,
-                "secret_key": "myhelper-secret-key-change-in-production",
-                "base_url": "http://localhost:5000"
-            },
-            "llm": {
-                "provider": "openai",
-                "model": "gpt-3.5-turbo",
-                "api_base": "https://api.openai.com/v1",
-                "api_key": "",
-                "max_tokens": 4000,
-                "temperature": 0.7,
-                "timeout": 60
-            },
-            "reports": {
-                "output_dir": "data/reports",
-                "templates_dir": "templates/reports",
-                "cleanup_days": 30
-            },
-            "notifications": {
-                "max_history": 1000,
-                "email": {
-                    "smtp_server": "smtp.gmail.com",
-                    "smtp_port": 587,
-                    "username": "",
-                    "password": "",
-                    "from_email": ""
-                },
-                "slack": {
-                    "webhook_url": "",
-                    "bot_token": "",
-                    "bot_name": "MyHelper",
-                    "icon_emoji": ":robot_face:"
-                }
-            },
-            "logging": {
-                "level": "INFO",
-                "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-                "max_file_size": 10485760,
-                "backup_count": 5
-            },
-            "security": {
-                "enable_cors": True,
-                "allowed_origins": ["*"],
-                "rate_limit_enabled": False,
-                "max_requests_per_minute": 60
-            }
+# 默认配置文件内容
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "system": {
+        "name": "MyHelper",
+        "version": "1.0.0",
+        "queue_check_interval": 5,
+        "max_retries": 3,
+        "task_timeout": 3600,
+        "subtask_parallelism": 8,
+        "llm_max_concurrency": 8,
+        "llm_rate_limit": 0,
+        "llm_probe_interval": 15,
+        "backup_enabled": True,
+        "backup_interval": 86400
+    },
+    "web": {
+        "host": "0.0.0.0",
+        "port": 5000,
+        "debug": False,
+        "threads": 8,
+        "secret_key": "myhelper-secret-key-change-in-production",
+        "base_url": "http://localhost:5000",
+        "health_cache_ttl": 1.0,
+        "use_x_sendfile": False
+    },
+    "llm": {
+        "provider": "openai",
+        "model": "gpt-3.5-turbo",
+        "api_base": "https://api.openai.com/v1",
+        "api_key": "",
+        "max_tokens": 4000,
+        "temperature": 0.7,
+        "timeout": 60
+    },
+    "reports": {
+        "output_dir": "data/reports",
+        "templates_dir": "templates/reports",
+        "cleanup_days": 30
+    },
+    "notifications": {
+        "max_history": 1000,
+        "email": {
+            "smtp_server": "smtp.gmail.com",
+            "smtp_port": 587,
+            "username": "",
+            "password": "",
+            "from_email": ""
+        },
+        "slack": {
+            "webhook_url": "",
+            "bot_token": "",
+            "bot_name": "MyHelper",
+            "icon_emoji": ":robot_face:"
         }
-        
-        config_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(default_config, f, indent=2, ensure_ascii=False)
-        
-        logger.info(f"创建默认配置文件: {config_file}")
-    
-    def setup_gitignore(self):
-        """设置.gitignore文件"""
-        gitignore_file = self.base_dir / '.gitignore'
-        
-        gitignore_content = """# MyHelper generated files
+    },
+    "logging": {
+        "level": "INFO",
+        "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        "max_file_size": 10485760,
+        "backup_count": 5
+    },
+    "security": {
+        "enable_cors": True,
+        "allowed_origins": ["*"],
+        "rate_limit_enabled": False,
+        "max_requests_per_minute": 60
+    }
+}
+
+
+# 默认配置是常量，导入时序列化一次
+_DEFAULT_CONFIG_JSON = json.dumps(DEFAULT_CONFIG, indent=2, ensure_ascii=False).encode('utf-8')
+
+# 初始化时生成的项目文件内容（UTF-8编码后的常量）
+_GITIGNORE_CONTENT = """# MyHelper generated files
 data/
 tmp/
 *.log
@@ -191,22 +132,9 @@ Thumbs.db
 config/local.json
 config/production.json
 .env
-"""
-        
-        if not gitignore_file.exists():
-            with open(gitignore_file, 'w', encoding='utf-8') as f:
-                f.write(gitignore_content)
-            logger.info(f"创建.gitignore文件: {gitignore_file}")
-    
-    def setup_readme(self):
-        """设置README文件"""
-        readme_file = self.base_dir / 'README.md'
-        
-        if readme_file.exists():
-            logger.info("README.md已存在，跳过创建")
-            return
-        
-        readme_content = """# MyHelper
+""".encode('utf-8')
+
+_README_CONTENT = """# MyHelper
 
 MyHelper是一个轻量化自包含的异步智能任务平台，使用Flask + Jinja2构建，支持自然语言任务规划和自动化执行。
 
@@ -282,59 +210,179 @@ myhelper/
 ## 许可证
 
 MIT License
-"""
+""".encode('utf-8')
+
+_REQUIREMENTS_CONTENT = """Flask==3.0.0
+Jinja2==3.1.2
+APScheduler==3.10.4
+requests==2.31.0
+waitress==3.0.0
+python-dotenv==1.0.0
+fcntl-py==0.2.0
+""".encode('utf-8')
+
+
+def _make_directory(path: str) -> bool:
+    """创建目录（含上级目录），返回是否新建
+    
+    直接mkdir，目录已存在时由FileExistsError得知，省去预先的stat。
+    """
+    try:
+        os.makedirs(path)
+    except FileExistsError:
+        return False
+    return True
+
+
+def _create_file(path, content: bytes) -> bool:
+    """仅当文件不存在时创建并写入内容，返回是否创建
+    
+    O_EXCL使存在性检查和创建合并为一次open，无需预先stat。
+    """
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return False
+    try:
+        view = memoryview(content)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    return True
+
+
+class FileSystemSetup:
+    """文件系统设置管理器"""
+    
+    def __init__(self, base_dir: str = None):
+        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
+        # 内部批量拼接路径时使用字符串，省去逐个构造Path对象
+        self._base_str = str(self.base_dir)
+        
+    def setup_directory_structure(self):
+        """设置完整的目录结构"""
+        directories = [
+            # 数据目录
+            'data',
+            'data/missions',
+            'data/queue',
+            'data/queue/pending',
+            'data/queue/processing', 
+            'data/queue/completed',
+            'data/queue/failed',
+            'data/logs',
+            'data/config',
+            'data/reports',
+            'data/backups',
+            
+            # 模板目录
+            'templates',
+            'templates/reports',
+            
+            # 静态文件目录
+            'static',
+            'static/css',
+            'static/js',
+            'static/images',
+            
+            # 配置目录
+            'config',
+            
+            # 临时目录
+            'tmp'
+        ]
+        
+        # 只创建叶子目录，上级目录由makedirs按需补建，已存在时每个叶子只需一次mkdir
+        leaf_paths = [
+            os.path.join(self._base_str, directory) for directory in directories
+            if not any(other.startswith(directory + '/') for other in directories)
+        ]
+        
+        # 各叶子目录互不依赖，并发创建以重叠系统调用的等待（网络文件系统上尤为明显）；
+        # makedirs对并发补建同一上级目录的竞争是安全的
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            created_flags = list(executor.map(_make_directory, leaf_paths))
+        
+        created_dirs = [path for path, created in zip(leaf_paths, created_flags) if created]
+        for dir_path in created_dirs:
+            logger.info("创建目录: %s", dir_path)
+        
+        if created_dirs:
+            logger.info("共创建 %s 个目录", len(created_dirs))
+        else:
+            logger.info("所有目录已存在")
+            
+        return created_dirs
+    
+    def setup_default_config(self):
+        """设置默认配置文件"""
+        config_file = self.base_dir / 'config' / 'default.json'
         
-        with open(readme_file, 'w', encoding='utf-8') as f:
-            f.write(readme_content)
+        if config_file.exists():
+            logger.info("配置文件已存在，跳过创建")
+            return
+        
+        config_file.parent.mkdir(parents=True, exist_ok=True)
+        config_file.write_bytes(_DEFAULT_CONFIG_JSON)
         
-        logger.info(f"创建README文件: {readme_file}")
+        logger.info("创建默认配置文件: %s", config_file)
+    
+    def setup_gitignore(self):
+        """设置.gitignore文件"""
+        gitignore_file = self.base_dir / '.gitignore'
+        
+        if _create_file(gitignore_file, _GITIGNORE_CONTENT):
+            logger.info("创建.gitignore文件: %s", gitignore_file)
+    
+    def setup_readme(self):
+        """设置README文件"""
+        readme_file = self.base_dir / 'README.md'
+        
+        if not _create_file(readme_file, _README_CONTENT):
+            logger.info("README.md已存在，跳过创建")
+            return
+        
+        logger.info("创建README文件: %s", readme_file)
     
     def setup_requirements(self):
         """设置requirements.txt文件"""
         requirements_file = self.base_dir / 'requirements.txt'
         
-        if requirements_file.exists():
+        if not _create_file(requirements_file, _REQUIREMENTS_CONTENT):
             logger.info("requirements.txt已存在，跳过创建")
             return
         
-        requirements_content = """Flask==3.0.0
-Jinja2==3.1.2
-APScheduler==3.10.4
-requests==2.31.0
-python-dotenv==1.0.0
-fcntl-py==0.2.0
-"""
-        
-        with open(requirements_file, 'w', encoding='utf-8') as f:
-            f.write(requirements_content)
-        
-        logger.info(f"创建requirements.txt文件: {requirements_file}")
+        logger.info("创建requirements.txt文件: %s", requirements_file)
     
     def setup_queue_files(self):
         """设置队列相关文件"""
-        queue_base = self.base_dir / 'data' / 'queue'
+        queue_base = os.path.join(self._base_str, 'data', 'queue')
         
         # 创建队列状态文件
-        status_file = queue_base / 'status.json'
-        if not status_file.exists():
-            status_data = {
-                "pending": 0,
-                "processing": 0,
-                "completed": 0,
-                "failed": 0,
-                "last_updated": "1970-01-01T00:00:00Z"
-            }
-            with open(status_file, 'w', encoding='utf-8') as f:
+        status_file = os.path.join(queue_base, 'status.json')
+        status_data = {
+            "pending": 0,
+            "processing": 0,
+            "completed": 0,
+            "failed": 0,
+            "last_updated": "1970-01-01T00:00:00Z"
+        }
+        # 'x'模式只在文件不存在时创建，存在性检查和创建合并为一次open
+        try:
+            with open(status_file, 'x', encoding='utf-8') as f:
                 json.dump(status_data, f, indent=2)
-            logger.info(f"创建队列状态文件: {status_file}")
+            logger.info("创建队列状态文件: %s", status_file)
+        except FileExistsError:
+            pass
         
         # 创建各队列目录的.gitkeep文件
         queue_dirs = ['pending', 'processing', 'completed', 'failed']
         for queue_dir in queue_dirs:
-            gitkeep_file = queue_base / queue_dir / '.gitkeep'
-            if not gitkeep_file.exists():
-                gitkeep_file.touch()
-                logger.info(f"创建.gitkeep文件: {gitkeep_file}")
+            gitkeep_file = os.path.join(queue_base, queue_dir, '.gitkeep')
+            if not _create_file(gitkeep_file, b''):
+                continue
+            logger.info("创建.gitkeep文件: %s", gitkeep_file)
     
     def verify_permissions(self):
         """验证目录权限"""
@@ -348,13 +396,14 @@ fcntl-py==0.2.0
         
         permission_issues = []
         for directory in critical_dirs:
-            dir_path = self.base_dir / directory
-            if dir_path.exists():
+            dir_path = os.path.join(self._base_str, directory)
+            # F_OK为0，与R_OK|W_OK按位或不起作用，存在性需单独判断
+            if os.path.isdir(dir_path):
                 if not os.access(dir_path, os.R_OK | os.W_OK):
-                    permission_issues.append(str(dir_path))
+                    permission_issues.append(dir_path)
         
         if permission_issues:
-            logger.warning(f"以下目录可能存在权限问题: {permission_issues}")
+            logger.warning("以下目录可能存在权限问题: %s", permission_issues)
         else:
             logger.info("目录权限检查通过")
         
@@ -391,18 +440,32 @@ fcntl-py==0.2.0
             'total_size': 0
         }
         
-        for item in self.base_dir.rglob('*'):
-            if item.is_dir():
-                info['directories'][str(item.relative_to(self.base_dir))] = {
+        # 每个目录只scandir一次：目录项自带类型并缓存stat结果，条目数在遍历时顺带统计
+        base = self._base_str
+        pending_dirs = [base]
+        while pending_dirs:
+            directory = pending_dirs.pop()
+            entry_count = 0
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        entry_count += 1
+                        if entry.is_dir(follow_symlinks=False):
+                            pending_dirs.append(entry.path)
+                        elif entry.is_file():
+                            try:
+                                info['total_size'] += entry.stat().st_size
+                            except OSError:
+                                pass
+            except OSError:
+                pass
+            
+            if directory != base:
+                info['directories'][os.path.relpath(directory, base)] = {
                     'exists': True,
-                    'writable': os.access(item, os.W_OK),
-                    'file_count': len(list(item.iterdir())) if item.exists() else 0
+                    'writable': os.access(directory, os.W_OK),
+                    'file_count': entry_count
                 }
-            elif item.is_file():
-                try:
-                    info['total_size'] += item.stat().st_size
-                except:
-                    pass
         
         return info
 
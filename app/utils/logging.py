@@ -7,52 +7,101 @@ import logging.handlers
 import os
 from pathlib import Path
 
+# 日志级别名称到级别值的映射（含logging模块接受的别名）
+_LEVEL_MAP = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'WARN': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'CRITICAL': logging.CRITICAL,
+    'FATAL': logging.CRITICAL
+}
+
+def _resolve_level(level: str) -> int:
+    """将日志级别名称转换为级别值，映射表之外的名称交给logging解析（包括自定义级别）"""
+    log_level = _LEVEL_MAP.get(level)
+    if log_level is None:
+        log_level = logging.getLevelName(level)
+        if not isinstance(log_level, int):
+            raise ValueError(f"未知的日志级别: {level}")
+    return log_level
+
+
+# 所有处理器共用的格式器
+_DEFAULT_FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
 
 def setup_logger(name: str, log_file: str = None, level: str = 'INFO') -> logging.Logger:
-    """设置日志记录器
+    """设置日志记录器（以相同的级别和文件重复调用时直接返回）
+    
+    级别或文件变化时更新级别，并替换本函数此前添加的处理器；其他代码添加的处理器保持不变。
     
     Args:
         name: 记录器名称
         log_file: 日志文件路径
-        level: 日志级别
+        level: 日志级别，NONE表示关闭全部日志
         
     Returns:
         配置好的记录器
     """
     # 创建记录器
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, level.upper()))
-    
-    # 如果已经有处理器，清除它们
-    if logger.handlers:
-        logger.handlers.clear()
+    level = level.upper()
+    config = (level, log_file)
+    previous = getattr(logger, '_myhelper_config', None)
+    if previous == config:
+        return logger
     
-    # 创建格式器
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    log_level = None if level == 'NONE' else _resolve_level(level)
     
-    # 控制台处理器
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    # 移除上一次配置添加的处理器
+    for handler in getattr(logger, '_myhelper_handlers', ()):
+        logger.removeHandler(handler)
+        handler.close()
+    handlers = []
     
-    # 文件处理器
-    if log_file:
-        # 确保日志目录存在
-        log_path = Path(log_file)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
+    if log_level is None:
+        # 关闭日志：根记录器挂NullHandler避免回退到stderr，
+        # logging.disable使所有日志调用在级别比较后立即返回
+        handlers.append(logging.NullHandler())
+        root = logging.getLogger()
+        if not any(isinstance(handler, logging.NullHandler) for handler in root.handlers):
+            root.addHandler(logging.NullHandler())
+        logging.disable(logging.CRITICAL)
+    else:
+        if previous is not None and previous[0] == 'NONE':
+            # 从关闭状态恢复
+            logging.disable(logging.NOTSET)
+        logger.setLevel(log_level)
+        
+        # 控制台处理器
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(_DEFAULT_FORMATTER)
+        handlers.append(console_handler)
         
-        # 旋转文件处理器
-        file_handler = logging.handlers.RotatingFileHandler(
-            log_file,
-            maxBytes=10*1024*1024,  # 10MB
-            backupCount=5,
-            encoding='utf-8'
-        )
-        file_handler.setLevel(getattr(logging, level.upper()))
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        # 文件处理器
+        if log_file:
+            # 确保日志目录存在
+            log_path = Path(log_file)
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # 旋转文件处理器
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=10*1024*1024,  # 10MB
+                backupCount=5,
+                encoding='utf-8'
+            )
+            file_handler.setLevel(log_level)
+            file_handler.setFormatter(_DEFAULT_FORMATTER)
+            handlers.append(file_handler)
     
-    return logger
\ No newline at end of file
+    for handler in handlers:
+        logger.addHandler(handler)
+    logger._myhelper_handlers = handlers
+    logger._myhelper_config = config
+    return logger
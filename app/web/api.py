@@ -5,38 +5,209 @@ Web后端API (BFF - Backend For Frontend)
 
 import os
 import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from flask import Flask, request, jsonify, render_template, send_file
+from flask.json.provider import DefaultJSONProvider
 from functools import wraps
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from ..core.config_manager import ConfigManager
-from ..core.mission_manager import MissionManager
-from ..core.queue_manager import QueueManager
 from ..core.worker import Worker
-from ..core.models import Mission, ReportConfig, NotificationConfig
+from ..core.models import Mission, MissionStatus, ReportConfig, NotificationConfig
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# 项目根目录及模板、静态文件目录（导入时计算一次）
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_TEMPLATE_DIR = os.path.join(_PROJECT_ROOT, 'templates')
+_STATIC_DIR = os.path.join(_PROJECT_ROOT, 'static')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """基于orjson的JSON提供者：接口响应的序列化和请求体的解析都走C实现
+    
+    datetime和dataclass交给Flask默认的default处理，输出格式与默认提供者一致。
+    """
+    
+    _BASE_OPTION = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME |
+                    orjson.OPT_PASSTHROUGH_DATACLASS) if orjson is not None else 0
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = self._BASE_OPTION
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode('utf-8')
+    
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        """jsonify的实现：orjson输出的bytes直接作为响应体，省去解码再编码"""
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self._BASE_OPTION
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        body = orjson.dumps(obj, default=self.default, option=option)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+# 数据目录状态很少变化，详细健康检查中的目录检查结果复用该秒数
+_FS_STATUS_TTL = 60
+
+
+# 后台连接测试结果的保留时间（秒）和最多保留的条数
+_TEST_RESULT_TTL = 600
+_TEST_RESULT_MAX = 256
+
+# 各类连接测试完成后的提示信息：(成功, 失败)
+_TEST_MESSAGES = {
+    'notification': ("测试通知发送完成", "测试通知发送失败"),
+    'llm': ("LLM连接正常", "LLM连接失败")
+}
+
+
+# 每页任务数达到该值时流式输出任务列表，避免整页的字典和JSON同时驻留内存
+_STREAM_MIN_PER_PAGE = 100
+
+
+# 响应时间戳缓存(秒, ISO字符串)：同一秒内的响应复用同一个字符串
+_timestamp_cache = (0, '')
+
+
+def _now_timestamp() -> str:
+    """当前时间的秒级ISO格式字符串，用于接口响应中的timestamp字段"""
+    global _timestamp_cache
+    seconds = time.time_ns() // 1_000_000_000
+    cached_second, value = _timestamp_cache
+    if cached_second != seconds:
+        value = datetime.fromtimestamp(seconds).isoformat()
+        _timestamp_cache = (seconds, value)
+    return value
+
+
+# 系统资源指标由后台线程每_METRICS_TTL秒采样一次，接口只读取最近的快照
+_METRICS_TTL = 5
+_system_metrics: Optional[Dict[str, Any]] = None
+_system_metrics_lock = threading.Lock()
+_system_metrics_thread: Optional[threading.Thread] = None
+
+
+def _sample_system_metrics(psutil, cpu_interval: Optional[float]) -> Dict[str, Any]:
+    """采集一次系统资源指标"""
+    cpu_percent = psutil.cpu_percent(interval=cpu_interval)
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('.')
+    return {
+        'cpu_percent': cpu_percent,
+        'memory_total': memory.total,
+        'memory_used': memory.used,
+        'memory_percent': memory.percent,
+        'disk_total': disk.total,
+        'disk_used': disk.used,
+        'disk_percent': (disk.used / disk.total) * 100
+    }
+
+
+def _system_metrics_loop(psutil):
+    """后台采样循环：cpu_percent阻塞1秒统计区间内的CPU使用率，其余时间休眠"""
+    global _system_metrics
+    while True:
+        try:
+            _system_metrics = _sample_system_metrics(psutil, cpu_interval=1)
+        except Exception as e:
+            logger.error(f"系统指标采样失败: {e}")
+        time.sleep(_METRICS_TTL - 1)
+
 
-def create_app(config_manager: ConfigManager) -> Flask:
-    """创建Flask应用"""
-    # 获取项目根目录
-    import os
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+def _get_system_metrics(psutil) -> Dict[str, Any]:
+    """获取最近一次的系统资源指标，首次调用时启动后台采样线程"""
+    global _system_metrics_thread
+    with _system_metrics_lock:
+        if _system_metrics_thread is None:
+            _system_metrics_thread = threading.Thread(
+                target=_system_metrics_loop, args=(psutil,), daemon=True, name='system-metrics'
+            )
+            _system_metrics_thread.start()
+    
+    data = _system_metrics
+    if data is None:
+        # 后台线程尚未完成首次采样：返回非阻塞的即时采样结果
+        data = _sample_system_metrics(psutil, cpu_interval=None)
+    return data
+
+
+# 日志尾部读取时每次向前读取的块大小
+_TAIL_CHUNK_SIZE = 8192
+
+
+def _tail_lines(path: str, n: int, level: str = '') -> List[str]:
+    """从文件末尾向前分块读取，返回最后n行（指定level时为最后n条包含该级别的行）
+    
+    读取量只与返回的行数相关，与日志文件总大小无关。
+    """
+    if n <= 0:
+        return []
+    
+    needle = level.encode('utf-8') if level else None
+    matched: List[bytes] = []
+    remainder = b''
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        while pos > 0 and len(matched) < n:
+            step = min(_TAIL_CHUNK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            buffer = f.read(step) + remainder
+            parts = buffer.split(b'\n')
+            # 第一段可能是不完整的行，留到下一轮与更前面的数据拼接
+            remainder = parts[0] if pos > 0 else b''
+            complete = parts[1:] if pos > 0 else parts
+            for line in reversed(complete):
+                if line.strip() and (needle is None or needle in line):
+                    matched.append(line)
+                    if len(matched) >= n:
+                        break
+    
+    matched.reverse()
+    return [line.decode('utf-8', errors='replace').strip() for line in matched]
+
+
+def create_app(config_manager: ConfigManager, worker: Optional[Worker] = None) -> Flask:
+    """创建Flask应用
     
+    传入worker时API与其共用同一个MissionManager和QueueManager，任务对象缓存和索引保持一致。
+    """
     app = Flask(__name__, 
-                template_folder=os.path.join(project_root, 'templates'),
-                static_folder=os.path.join(project_root, 'static'))
+                template_folder=_TEMPLATE_DIR,
+                static_folder=_STATIC_DIR)
     
     # 配置Flask
     app.config['SECRET_KEY'] = config_manager.get('web.secret_key', 'myhelper-secret-key')
     app.config['JSON_AS_ASCII'] = False
+    # 部署在nginx/Apache之后时，报告文件由前端服务器通过X-Sendfile发送，不占用Python线程
+    app.config['USE_X_SENDFILE'] = config_manager.get('web.use_x_sendfile', False)
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
     
     # 初始化组件
-    mission_manager = MissionManager()
-    queue_manager = QueueManager()
-    worker = Worker(config_manager)
+    if worker is None:
+        worker = Worker(config_manager)
+    mission_manager = worker.mission_manager
+    queue_manager = worker.queue_manager
     
     # Worker将在main.py中启动，这里不自动启动
     
@@ -61,10 +232,51 @@ def create_app(config_manager: ConfigManager) -> Flask:
             'success': success,
             'message': message,
             'data': data,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': _now_timestamp()
         }
         return jsonify(response), status_code
     
+    # 健康检查结果缓存：负载均衡/监控频繁探测时，TTL内直接复用上一次的结果，
+    # 并发的探测请求在锁上等待同一次计算，避免重复调用LLM连接测试
+    health_cache_ttl = config_manager.get('web.health_cache_ttl', 1.0)
+    health_cache: Dict[str, tuple] = {}
+    health_locks = {'basic': threading.Lock(), 'detailed': threading.Lock()}
+    
+    def cached_health(name: str, compute):
+        """返回(数据, 状态码)，请求带fresh=1时跳过缓存"""
+        fresh = request.args.get('fresh') == '1'
+        if not fresh:
+            entry = health_cache.get(name)
+            if entry is not None and time.monotonic() - entry[0] < health_cache_ttl:
+                return entry[1], entry[2]
+        
+        with health_locks[name]:
+            if not fresh:
+                entry = health_cache.get(name)
+                if entry is not None and time.monotonic() - entry[0] < health_cache_ttl:
+                    return entry[1], entry[2]
+            data, status_code = compute()
+            health_cache[name] = (time.monotonic(), data, status_code)
+            return data, status_code
+    
+    fs_status_cache = {'ts': None, 'val': None}
+    
+    def get_filesystem_status() -> Dict[str, bool]:
+        """数据目录状态，_FS_STATUS_TTL秒内复用上次的检查结果（fresh=1时重新检查）"""
+        now = time.monotonic()
+        ts = fs_status_cache['ts']
+        if ts is not None and now - ts < _FS_STATUS_TTL and request.args.get('fresh') != '1':
+            return fs_status_cache['val']
+        
+        status = {
+            'data_dir_writable': os.access('data', os.W_OK),
+            'queue_dir_exists': os.path.exists('data/queue'),
+            'logs_dir_exists': os.path.exists('data/logs')
+        }
+        fs_status_cache['val'] = status
+        fs_status_cache['ts'] = now
+        return status
+    
     # ===================
     # 主页和基础路由
     # ===================
@@ -82,13 +294,17 @@ def create_app(config_manager: ConfigManager) -> Flask:
     @app.route('/health')
     def health_check():
         """健康检查"""
-        try:
+        def compute():
             worker_status = worker.get_worker_status()
-            return api_response({
+            return {
                 'status': 'healthy',
                 'worker': worker_status,
-                'timestamp': datetime.now().isoformat()
-            })
+                'timestamp': _now_timestamp()
+            }, 200
+        
+        try:
+            data, status_code = cached_health('basic', compute)
+            return api_response(data, status_code=status_code)
         except Exception as e:
             return api_response(
                 message=f"健康检查失败: {e}",
@@ -100,28 +316,26 @@ def create_app(config_manager: ConfigManager) -> Flask:
     @handle_errors
     def detailed_health_check():
         """详细健康检查"""
-        try:
+        def compute():
             # Worker状态
             worker_status = worker.get_worker_status()
             
             # 配置状态
             config_status = {
                 'loaded': True,
-                'config_file_exists': config_manager.config_file.exists() if hasattr(config_manager, 'config_file') else True
+                'config_file_exists': config_manager.config_file.exists()
             }
             
             # LLM连接状态
             llm_status = {
                 'configured': bool(config_manager.get('llm.api_key')),
-                'connection_test': worker.llm_manager.test_connection() if config_manager.get('llm.api_key') else False
+                'connection_test': worker.get_llm_health(
+                    force=request.args.get('fresh') == '1'
+                )['connected'] if config_manager.get('llm.api_key') else False
             }
             
             # 文件系统状态
-            filesystem_status = {
-                'data_dir_writable': os.access('data', os.W_OK),
-                'queue_dir_exists': os.path.exists('data/queue'),
-                'logs_dir_exists': os.path.exists('data/logs')
-            }
+            filesystem_status = get_filesystem_status()
             
             # 通知驱动状态
             notification_status = worker.notification_manager.get_driver_status()
@@ -133,15 +347,19 @@ def create_app(config_manager: ConfigManager) -> Flask:
                 'llm': llm_status,
                 'filesystem': filesystem_status,
                 'notifications': notification_status,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': _now_timestamp()
             }
             
             # 检查是否有任何组件不健康
             if not worker_status.get('running') or not filesystem_status.get('data_dir_writable'):
                 health_data['overall_status'] = 'unhealthy'
-                return api_response(health_data, status_code=503)
+                return health_data, 503
             
-            return api_response(health_data)
+            return health_data, 200
+        
+        try:
+            health_data, status_code = cached_health('detailed', compute)
+            return api_response(health_data, status_code=status_code)
             
         except Exception as e:
             return api_response(
@@ -157,63 +375,41 @@ def create_app(config_manager: ConfigManager) -> Flask:
         """获取系统指标"""
         try:
             import psutil
-            import time
-            
-            # 系统资源使用情况
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('.')
-            
-            # 应用指标
-            missions = mission_manager.get_all_missions()
-            queue_status = queue_manager.get_queue_status()
-            worker_status = worker.get_worker_status()
             
-            # LLM使用统计
-            llm_stats = worker.llm_manager.get_usage_stats()
+            # 系统资源使用情况（后台线程定期采样，请求不再阻塞等待CPU统计）
+            system_metrics = _get_system_metrics(psutil)
             
-            # 通知历史
-            notification_history = worker.notification_manager.get_notification_history(limit=10)
+            # 应用指标（任务总数取自增量维护的状态计数，无需加载全部任务）
+            total_missions = sum(mission_manager.count_missions_by_status().values())
+            # 队列状态、LLM使用统计和通知历史一次收集
+            snapshot = worker.collect_metrics_snapshot()
             
             metrics = {
-                'system': {
-                    'cpu_percent': cpu_percent,
-                    'memory_total': memory.total,
-                    'memory_used': memory.used,
-                    'memory_percent': memory.percent,
-                    'disk_total': disk.total,
-                    'disk_used': disk.used,
-                    'disk_percent': (disk.used / disk.total) * 100
-                },
+                'system': system_metrics,
                 'application': {
-                    'total_missions': len(missions),
-                    'queue_status': queue_status,
-                    'worker_running': worker_status.get('running', False),
-                    'uptime_seconds': time.time() - (getattr(worker, 'start_time', time.time()))
-                },
-                'llm': llm_stats,
-                'notifications': {
-                    'recent_count': len(notification_history),
-                    'success_rate': sum(1 for n in notification_history if n.get('success')) / len(notification_history) if notification_history else 0
+                    'total_missions': total_missions,
+                    'queue_status': snapshot['queue_status'],
+                    'worker_running': snapshot['running'],
+                    'uptime_seconds': worker.uptime_seconds()
                 },
-                'timestamp': datetime.now().isoformat()
+                'llm': snapshot['llm_stats'],
+                'notifications': snapshot['notifications'],
+                'timestamp': _now_timestamp()
             }
             
             return api_response(metrics)
             
         except ImportError:
             # psutil not available, return basic metrics
-            missions = mission_manager.get_all_missions()
-            queue_status = queue_manager.get_queue_status()
-            worker_status = worker.get_worker_status()
+            total_missions = sum(mission_manager.count_missions_by_status().values())
             
             basic_metrics = {
                 'application': {
-                    'total_missions': len(missions),
-                    'queue_status': queue_status,
-                    'worker_running': worker_status.get('running', False)
+                    'total_missions': total_missions,
+                    'queue_status': queue_manager.get_queue_status(),
+                    'worker_running': worker.running
                 },
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': _now_timestamp(),
                 'note': 'Limited metrics - install psutil for full system metrics'
             }
             
@@ -241,22 +437,14 @@ def create_app(config_manager: ConfigManager) -> Flask:
                     message="日志文件不存在"
                 )
             
-            # 读取日志文件的最后N行
-            with open(log_file, 'r', encoding='utf-8') as f:
-                all_lines = f.readlines()
-            
-            # 获取最后的lines行
-            recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-            
-            # 过滤日志级别
-            if level:
-                recent_lines = [line for line in recent_lines if level in line]
+            # 从文件末尾读取最后N行，指定级别时向前扫描直到凑满N条匹配行
+            recent_lines = _tail_lines(log_file, lines, level)
             
             logs_data = {
-                'logs': [line.strip() for line in recent_lines],
+                'logs': recent_lines,
                 'total_lines': len(recent_lines),
                 'log_file': log_file,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': _now_timestamp()
             }
             
             return api_response(logs_data)
@@ -280,28 +468,71 @@ def create_app(config_manager: ConfigManager) -> Flask:
         per_page = request.args.get('per_page', 20, type=int)
         status = request.args.get('status')
         
-        # 获取任务列表
-        missions = mission_manager.get_all_missions()
-        
-        # 状态过滤
+        # 总数和分页都走内存索引，只加载当前页的完整任务数据
+        status_counts = mission_manager.count_missions_by_status()
         if status:
-            missions = [m for m in missions if m.status.value == status]
+            total = status_counts.get(status, 0)
+            try:
+                status_filter = MissionStatus(status)
+            except ValueError:
+                status_filter = None
+        else:
+            total = sum(status_counts.values())
+            status_filter = None
         
-        # 分页
-        total = len(missions)
-        start = (page - 1) * per_page
-        end = start + per_page
-        missions_page = missions[start:end]
+        start = max(page - 1, 0) * per_page
+        page_infos = []
+        if total and per_page > 0:
+            page_infos = mission_manager.list_missions(status=status_filter, limit=per_page, offset=start)
         
-        return api_response({
-            'missions': [mission.to_dict() for mission in missions_page],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': total,
-                'pages': (total + per_page - 1) // per_page
-            }
-        })
+        pagination = {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page
+        }
+        
+        def iter_missions():
+            for info in page_infos:
+                mission = mission_manager.get_mission(info['mission_id'])
+                if mission:
+                    yield mission
+        
+        if orjson is None or per_page < _STREAM_MIN_PER_PAGE:
+            return api_response({
+                'missions': [mission.to_dict() for mission in iter_missions()],
+                'pagination': pagination
+            })
+        
+        # 大分页：逐个任务序列化并输出，结构与api_response一致（键按字母序）
+        option = OrjsonProvider._BASE_OPTION | orjson.OPT_SORT_KEYS
+        default = app.json.default
+        timestamp = _now_timestamp()
+        
+        def generate():
+            # 生成器在handle_errors返回后才运行：出错的任务记录日志后跳过，保证输出始终是完整的JSON
+            yield b'{"data":{"missions":['
+            separator = b''
+            failed = 0
+            for info in page_infos:
+                try:
+                    mission = mission_manager.get_mission(info['mission_id'])
+                    if not mission:
+                        continue
+                    chunk = orjson.dumps(mission.to_dict(), default=default, option=option)
+                except Exception as e:
+                    logger.error(f"任务列表输出失败 {info['mission_id']}: {e}")
+                    failed += 1
+                    continue
+                yield separator + chunk
+                separator = b','
+            
+            message = f"部分任务读取失败: {failed}" if failed else "success"
+            yield (b'],"pagination":' + orjson.dumps(pagination, option=option) +
+                   b'},"message":' + orjson.dumps(message) +
+                   b',"success":true,"timestamp":' + orjson.dumps(timestamp) + b'}\n')
+        
+        return app.response_class(generate(), mimetype='application/json')
     
     @app.route('/api/missions/<mission_id>', methods=['GET'])
     @handle_errors
@@ -356,8 +587,8 @@ def create_app(config_manager: ConfigManager) -> Flask:
                 )
                 mission.notification_configs.append(notification_config)
         
-        # 保存任务
-        mission_manager.create_mission(mission)
+        # 保存任务（任务随后交给Worker处理，需确保已落盘）
+        mission_manager.create_mission(mission, durable=True)
         
         # 加入队列
         queue_manager.enqueue(mission.mission_id)
@@ -407,10 +638,17 @@ def create_app(config_manager: ConfigManager) -> Flask:
                 status_code=404
             )
         
-        # 重置任务状态
-        from ..core.models import MissionStatus
+        # 只允许重试已失败的任务，执行中的任务重试会与Worker冲突并重复入队
+        if mission.status != MissionStatus.FAILED:
+            return api_response(
+                message=f"任务状态为{mission.status.value}，只能重试失败的任务",
+                success=False,
+                status_code=409
+            )
+        
+        # 重置任务状态（mission是副本，不影响Worker持有的对象）
         mission.update_status(MissionStatus.PENDING)
-        mission_manager.update_mission(mission)
+        mission_manager.update_mission(mission, durable=True)
         
         # 重新加入队列
         queue_manager.enqueue(mission_id)
@@ -450,13 +688,8 @@ def create_app(config_manager: ConfigManager) -> Flask:
     @handle_errors
     def get_stats():
         """获取统计信息"""
-        missions = mission_manager.get_all_missions()
-        
-        # 统计不同状态的任务数量
-        status_count = {}
-        for mission in missions:
-            status = mission.status.value
-            status_count[status] = status_count.get(status, 0) + 1
+        # 各状态的任务数量由MissionManager增量维护，无需加载全部任务
+        status_count = mission_manager.count_missions_by_status()
         
         # 队列状态
         queue_status = queue_manager.get_queue_status()
@@ -466,7 +699,7 @@ def create_app(config_manager: ConfigManager) -> Flask:
         
         return api_response({
             'mission_stats': {
-                'total': len(missions),
+                'total': sum(status_count.values()),
                 'by_status': status_count
             },
             'queue_stats': queue_status,
@@ -506,20 +739,34 @@ def create_app(config_manager: ConfigManager) -> Flask:
     def get_config():
         """获取配置信息"""
         # 只返回非敏感配置
-        config = config_manager.get_all_config()
-        
-        # 移除敏感信息
-        safe_config = {}
-        for key, value in config.items():
-            if 'password' not in key.lower() and 'secret' not in key.lower() and 'key' not in key.lower():
-                safe_config[key] = value
-        
-        return api_response(safe_config)
+        return api_response(config_manager.get_safe_config())
     
     # ===================
     # 测试和调试API
     # ===================
     
+    # 连接测试涉及外部网络请求，放到后台线程池执行：接口立即返回test_id，客户端轮询结果
+    test_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='api-test')
+    test_futures: 'OrderedDict[str, tuple]' = OrderedDict()  # test_id -> (提交时间, 测试类型, future)
+    test_futures_lock = threading.Lock()
+    
+    def submit_test(test_type: str, fn, *args, **kwargs):
+        """提交后台连接测试，返回202和test_id"""
+        test_id = uuid.uuid4().hex
+        future = test_executor.submit(fn, *args, **kwargs)
+        now = time.monotonic()
+        with test_futures_lock:
+            test_futures[test_id] = (now, test_type, future)
+            # 按提交顺序淘汰过期或超出数量上限的记录
+            while len(test_futures) > _TEST_RESULT_MAX or \
+                    now - next(iter(test_futures.values()))[0] > _TEST_RESULT_TTL:
+                test_futures.popitem(last=False)
+        
+        return api_response({
+            'test_id': test_id,
+            'type': test_type
+        }, message="测试已提交", status_code=202)
+    
     @app.route('/api/test/notification', methods=['POST'])
     @handle_errors
     def test_notification():
@@ -533,24 +780,61 @@ def create_app(config_manager: ConfigManager) -> Flask:
                 status_code=400
             )
         
-        success = worker.notification_manager.test_notification(
+        return submit_test(
+            'notification',
+            worker.notification_manager.test_notification,
             notification_type=data['type'],
             target=data['target']
         )
-        
-        return api_response({
-            'test_result': success
-        }, message="测试通知发送完成" if success else "测试通知发送失败")
     
     @app.route('/api/test/llm', methods=['POST'])
     @handle_errors
     def test_llm():
-        """测试LLM连接"""
-        success = worker.llm_manager.test_connection()
+        """测试LLM连接（立即探测，并刷新健康检查使用的结果）"""
+        return submit_test('llm', lambda: worker.get_llm_health(force=True)['connected'])
+    
+    @app.route('/api/test/result/<test_id>', methods=['GET'])
+    @handle_errors
+    def get_test_result(test_id: str):
+        """查询后台连接测试的结果"""
+        with test_futures_lock:
+            entry = test_futures.get(test_id)
+            # 过期记录只在提交时批量淘汰，查询时同样按TTL判断
+            if entry is not None and time.monotonic() - entry[0] > _TEST_RESULT_TTL:
+                del test_futures[test_id]
+                entry = None
         
-        return api_response({
+        if entry is None:
+            return api_response(
+                message="测试不存在或已过期",
+                success=False,
+                status_code=404
+            )
+        
+        _, test_type, future = entry
+        if not future.done():
+            # 进行中返回202，test_result为None，不能被当作测试成功
+            return api_response({
+                'test_id': test_id,
+                'type': test_type,
+                'done': False,
+                'test_result': None
+            }, message="测试进行中", status_code=202)
+        
+        error = future.exception()
+        success = bool(future.result()) if error is None else False
+        success_message, failure_message = _TEST_MESSAGES[test_type]
+        
+        result = {
+            'test_id': test_id,
+            'type': test_type,
+            'done': True,
             'test_result': success
-        }, message="LLM连接正常" if success else "LLM连接失败")
+        }
+        if error is not None:
+            result['error'] = str(error)
+        
+        return api_response(result, message=success_message if success else failure_message)
     
     # 错误处理
     @app.errorhandler(404)
@@ -5,6 +5,13 @@ MyHelper: 轻量化自包含的异步智能任务平台
 """
 
 import os
+
+# USE_GEVENT=1时以gevent协程模式运行：monkey patch必须先于其他标准库和应用模块的导入
+USE_GEVENT = os.environ.get("USE_GEVENT") == "1"
+if USE_GEVENT:
+    from gevent import monkey
+    monkey.patch_all()
+
 import sys
 import time
 from pathlib import Path
@@ -22,16 +29,19 @@ from app.utils.logging import setup_logger
 def main():
     """主程序入口"""
     # 设置日志
-    logger = setup_logger("myhelper", "data/logs/myhelper.log")
+    logger = setup_logger("myhelper", "data/logs/myhelper.log",
+                          os.environ.get("LOG_LEVEL", "INFO"))
 
     # 初始化配置管理器
     config_manager = ConfigManager()
 
+    # 后台工作线程与Web应用共用同一组管理器
+    worker = Worker(config_manager)
+
     # 创建Flask应用
-    app = create_app(config_manager)
+    app = create_app(config_manager, worker)
 
     # 启动后台工作线程
-    worker = Worker(config_manager)
     worker.start()  # 使用start方法而不是直接运行
 
     # 从配置读取服务器参数
@@ -42,8 +52,25 @@ def main():
     logger.info("MyHelper启动成功")
     logger.info(f"Web界面: http://localhost:{port}")
 
-    # 启动Flask开发服务器
-    app.run(host=host, port=port, debug=debug, threaded=True)
+    # 调试模式使用Flask开发服务器，否则使用waitress线程池WSGI服务器（或gevent）
+    if debug:
+        app.run(host=host, port=port, debug=debug, threaded=True)
+        return
+
+    if USE_GEVENT:
+        from gevent.pywsgi import WSGIServer
+        logger.info("使用gevent WSGI服务器")
+        WSGIServer((host, port), app).serve_forever()
+        return
+
+    try:
+        from waitress import serve
+    except ImportError:
+        logger.warning("未安装waitress，回退到Flask开发服务器")
+        app.run(host=host, port=port, debug=debug, threaded=True)
+        return
+
+    serve(app, host=host, port=port, threads=config_manager.get("web.threads", 8))
 
 
 if __name__ == "__main__":